@@ -18,29 +18,137 @@ Internal class for interacting with the AgML public dataset S3 bucket.
 
 import os
 import sys
-import json
+import shutil
 import zipfile
+import functools
+import tempfile
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
+import botocore.config
 import botocore.exceptions
+from boto3.s3.transfer import TransferConfig
 
+from agml.utils.data import load_public_sources
 from agml.utils.logging import tqdm
 
 
+# Large files are transferred in multiple parts, concurrently.
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024, multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=10, use_threads=True)
+
+# The size of the chunks which downloads are streamed in.
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# The size of the buffer used to copy extracted files to disk.
+_EXTRACT_BUFFER_SIZE = 1024 * 1024
+
+# Zip files up to this size are kept in memory when they can't be streamed.
+_SPOOLED_ZIP_MAX_SIZE = 512 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=None)
+def _s3_client():
+    """Returns the S3 client, which is only constructed once (this is slow)."""
+    return boto3.client(
+        's3', config=botocore.config.Config(max_pool_connections=20))
+
+
+def _member_path(dest_dir, name):
+    """Returns the path to extract a zip member to, checking that it is safe."""
+    path = os.path.normpath(os.path.join(dest_dir, name))
+    if os.path.isabs(name) or os.path.commonpath(
+            [os.path.abspath(dest_dir), os.path.abspath(path)]) != os.path.abspath(dest_dir):
+        raise ValueError(f"Refusing to extract '{name}' outside of '{dest_dir}'.")
+    return path
+
+
+def _extract_members(z, dest_dir):
+    """Extracts all of the members of an open `zipfile.ZipFile` in parallel.
+
+    The decompression (which releases the GIL) is the bottleneck of the
+    extraction, so the files are extracted using a pool of threads. The
+    directories are created beforehand, so the threads don't race to do so.
+    """
+    members = []
+    for info in z.infolist():
+        path = _member_path(dest_dir, info.filename)
+        if info.is_dir():
+            os.makedirs(path, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            members.append((info, path))
+
+    def _extract(member):
+        # The files are copied with a larger buffer than `ZipFile.extract`.
+        info, path = member
+        with z.open(info) as src, open(path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, _EXTRACT_BUFFER_SIZE)
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        list(pool.map(_extract, members))
+
+
+def _extract_zip_stream(chunks, dest_dir, verbose=False):
+    """Extracts a zip file, given as an iterable of byte chunks, into `dest_dir`.
+
+    If `stream-unzip` is installed, each member is written directly to disk
+    as its data arrives. Otherwise, the zip file is buffered (in memory, if it
+    is small enough) in order to be read with `zipfile`, since its central
+    directory is at the end of the file. If `verbose`, then the names of the
+    extracted files are printed.
+    """
+    try:
+        from stream_unzip import stream_unzip
+    except ImportError:
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOLED_ZIP_MAX_SIZE) as data:
+            for chunk in chunks:
+                data.write(chunk)
+            data.seek(0)
+
+            # `SpooledTemporaryFile` only implements the whole file interface
+            # (which `zipfile` needs) from Python 3.11, so the underlying file
+            # is read instead (a `BytesIO`, or a temporary file on disk).
+            with zipfile.ZipFile(data._file, 'r') as z:
+                if verbose:
+                    z.printdir()
+                _extract_members(z, dest_dir)
+        return
+
+    for name, _, member_chunks in stream_unzip(chunks):
+        name = name.decode('utf-8')
+        path = _member_path(dest_dir, name)
+        if verbose:
+            print(name)
+        if name.endswith('/'):
+            os.makedirs(path, exist_ok=True)
+            for _ in member_chunks: # the data needs to be consumed
+                pass
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            for chunk in member_chunks:
+                f.write(chunk)
+
+
 class InternalAgMLS3API(object):
     """
     Internal API for interaction with the dataset S3 bucket.
 
     *Note*: This class should only be used by the AgML developers.
+
+    When making several transfers, use the API as a context manager
+    (`with InternalAgMLS3API() as api: ...`) to reuse one progress bar
+    for all of them, which is closed at the end of the block.
     """
     def __init__(self):
-        # Read in metadata for data sources file
+        # Path to the metadata for data sources file (which is only read
+        # once it is needed, see the `data_srcs` property).
         self.data_srcs_path = os.path.join(
             os.path.dirname(os.path.dirname(__file__)),
             '_assets', 'public_datasources.json')
-        with open(self.data_srcs_path) as f:
-            self.data_srcs = json.load(f)
 
         # Define s3 bucket URI
         self.agdata_s3_uri = 'https://s3.us-west-1.amazonaws.com/agdata-data/'
@@ -48,6 +156,47 @@ class InternalAgMLS3API(object):
         # Initialize attribute for storing dataset download path
         self.dataset_download_path = None
 
+        # The progress bar, which is reused across the transfers made in
+        # a `with` block, and closed after each transfer otherwise.
+        self.pg = None
+        self._keep_progress_bar = False
+
+    def __enter__(self):
+        self._keep_progress_bar = True
+        return self
+
+    def __exit__(self, *exc):
+        self._keep_progress_bar = False
+        self.close()
+
+    def close(self):
+        """Closes the progress bar, once all of the transfers are done."""
+        if self.pg is not None:
+            self.pg.close()
+            self.pg = None
+
+    def _progress_bar(self, total, desc):
+        """Returns the progress bar, reset for a new transfer."""
+        if self.pg is None:
+            self.pg = tqdm(total=total, file=sys.stdout, desc=desc,
+                           mininterval=0.2, miniters=1024 * 1024)
+        else:
+            self.pg.reset(total=total)
+            self.pg.set_description(desc)
+        return self.pg
+
+    def _finish_transfer(self):
+        """Refreshes the progress bar, or closes it outside of a `with` block."""
+        if self._keep_progress_bar:
+            self.pg.refresh()
+        else:
+            self.close()
+
+    @property
+    def data_srcs(self):
+        """Returns the metadata for the AgML public data sources."""
+        return load_public_sources()
+
     @property
     def data_sources(self):
         """Returns a list of AgML public data sources."""
@@ -65,12 +214,12 @@ class InternalAgMLS3API(object):
             path to directory where dataset is stored
         """
         # Establish connection with s3 via boto
-        self.s3 = boto3.client('s3')
+        self.s3 = _s3_client()
 
         # Setup progress bar
-        self.pg = tqdm(
+        self._progress_bar(
             total=os.stat(os.path.abspath(os.path.join(dataset_dir, dataset_name + '.zip'))).st_size,
-            file=sys.stdout, desc=f"Uploading {dataset_name}")
+            desc=f"Uploading {dataset_name}")
 
         # Upload data to agdata-data bucket
         try:
@@ -78,13 +227,14 @@ class InternalAgMLS3API(object):
                 self.s3.upload_fileobj(Fileobj=data, 
                                        Bucket='agdata-data',
                                        Key='datasets/' + dataset_name + '.zip',
-                                       Callback=lambda x: self.pg.update(x))
+                                       Callback=self.pg.update,
+                                       Config=_TRANSFER_CONFIG)
         except:
             warnings.warn(
                 f'Upload of {dataset_name} unsuccessful. You may not have permission '
                 f'to upload to the agdata-data s3 bucket.', category = UserWarning)
         finally:
-            self.pg.close()
+            self._finish_transfer()
 
     def upload_model(self, model_name, model_dir):
         """Uploads model to agdata-data s3 file storage.
@@ -97,12 +247,12 @@ class InternalAgMLS3API(object):
             path to directory where model is stored
         """
         # Establish connection with s3 via boto
-        self.s3 = boto3.client('s3')
+        self.s3 = _s3_client()
 
         # Setup progress bar
-        self.pg = tqdm(
+        self._progress_bar(
             total=os.stat(os.path.abspath(os.path.join(model_dir, model_name + '.pth'))).st_size,
-            file=sys.stdout, desc = f"Uploading {model_name}")
+            desc=f"Uploading {model_name}")
 
         # Upload data to agdata-data bucket
         try:
@@ -110,15 +260,16 @@ class InternalAgMLS3API(object):
                 self.s3.upload_fileobj(Fileobj=data, 
                                        Bucket='agdata-data',
                                        Key='models/' + model_name + '.pth',
-                                       Callback=lambda x: self.pg.update(x))
+                                       Callback=self.pg.update,
+                                       Config=_TRANSFER_CONFIG)
         except:
             warnings.warn(
                 f'Upload of {model_name} unsuccessful. You may not have permission '
                 f'to upload to the agdata-data s3 bucket.', category = UserWarning)
         finally:
-            self.pg.close()
+            self._finish_transfer()
 
-    def download_dataset(self, dataset_name, dest_dir):
+    def download_dataset(self, dataset_name, dest_dir, verbose=False):
         """
         Downloads dataset from agdata-data s3 file storage.
         
@@ -128,45 +279,38 @@ class InternalAgMLS3API(object):
             name of dataset to download
         dest_dir : str
             path for saving downloaded dataset
+        verbose : bool
+            whether to print the names of the extracted files
         """
         # Validate the dataset name.
         if dataset_name not in self.data_sources:
             raise ValueError(f"Invalid dataset '{dataset_name}.'")
 
         # Establish connection with s3 via boto
-        self.s3 = boto3.client('s3')
-        self.s3_resource = boto3.resource('s3')
+        self.s3 = _s3_client()
 
-        # Setup progress bar
+        # Start the download of the dataset, which is streamed directly into
+        # the extraction rather than first being written to a zip file.
         try:
-            self.pg = tqdm(
-                total=float(self.s3_resource.ObjectSummary(
-                    bucket_name='agdata-data', key=dataset_name + '.zip').size),
-                file=sys.stdout, desc = f"Downloading {dataset_name}")
+            obj = self.s3.get_object(Bucket='agdata-data', Key=dataset_name + '.zip')
         except botocore.exceptions.ClientError as ce:
-            if "Not Found" in str(ce):
+            if ce.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey'):
                 raise ValueError(
                     f"The dataset '{dataset_name}' could not be found in "
                     f"the bucket, perhaps it has not been uploaded yet.")
             raise ce
 
-        # File path of zipped dataset
-        self.dataset_download_path = os.path.join(dest_dir, dataset_name + '.zip')
+        # Setup progress bar
+        self._progress_bar(total=obj['ContentLength'],
+                           desc=f"Downloading {dataset_name}")
 
-        # Upload data to agdata-data bucket
-        with open(self.dataset_download_path, 'wb') as data:
-            self.s3.download_fileobj(Bucket='agdata-data', 
-                                     Key=dataset_name + '.zip', 
-                                     Fileobj=data,
-                                     Callback=lambda x: self.pg.update(x))
-        self.pg.close()
-
-        # Unzip downloaded dataset
-        with zipfile.ZipFile(self.dataset_download_path, 'r') as z:
-            z.printdir()
-            print('Extracting files...')
-            z.extractall(path=dest_dir)
-            print('Done!')
-
-        # Delete zipped file
-        os.remove(self.dataset_download_path)
+        def _chunks():
+            for chunk in obj['Body'].iter_chunks(chunk_size=_DOWNLOAD_CHUNK_SIZE):
+                self.pg.update(len(chunk))
+                yield chunk
+
+        # Extract the dataset while it is being downloaded.
+        try:
+            _extract_zip_stream(_chunks(), dest_dir, verbose=verbose)
+        finally:
+            self._finish_transfer()
@@ -12,13 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import io
-import re
 import sys
 import yaml
 import collections
 from typing import Iterable
 
+import numpy as np
+
 from agml.framework import AgMLSerializable
 import agml.utils.logging as logging
 from agml.utils.general import has_nested_dicts
@@ -32,6 +32,17 @@ Tasks = collections.namedtuple('Tasks', ['ml', 'ag'])
 Location = collections.namedtuple('Location', ['continent', 'country'])
 ImageStats = collections.namedtuple('ImageStats', ['mean', 'std'])
 
+# Use the libyaml-backed emitter for the metadata summary, if available.
+_YAMLDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+def _class_number(key):
+    """Converts a class key (e.g., '1') from the metadata to an integer."""
+    try:
+        return int(key)
+    except ValueError: # keys such as '1.0'
+        return int(float(key))
+
 
 def make_metadata(name, meta = None):
     """Creates the metadata object for the dataset.
@@ -45,7 +56,7 @@ def make_metadata(name, meta = None):
         name = name.name
     if isinstance(name, (list, tuple, set, frozenset)): # a single dataset
         name = next(iter(name))
-    if name in load_public_sources().keys():
+    if name in load_public_sources():
         return DatasetMetadata(name)
     return CustomDatasetMetadata(name, meta)
 
@@ -98,7 +109,9 @@ class DatasetMetadata(AgMLSerializable):
     property of this class, but any additional info that is not can
     be accessed by treating the `info` object as a dictionary.
     """
-    serializable = frozenset(('name', 'metadata', 'citation_meta'))
+    serializable = frozenset((
+        'name', 'metadata', 'citation_meta', 'num_to_class',
+        'class_to_num', 'classes', 'has_nested_classes'))
     is_custom_dataset = False
 
     def __init__(self, name):
@@ -130,15 +143,14 @@ class DatasetMetadata(AgMLSerializable):
             name = name.name
 
         source_info = load_public_sources()
-        if name not in source_info.keys():
-            if name.replace('-', '_') not in source_info.keys():
+        if name not in source_info:
+            resolved_name = name.replace('-', '_')
+            if resolved_name not in source_info:
                 msg = f"Received invalid public source: '{name}'."
                 msg = maybe_you_meant(name, msg)
                 raise ValueError(msg)
-            else:
-                logging.log(
-                    f"Interpreted dataset '{name}' as '{name.replace('-', '_')}.'")
-                name = name.replace('-', '_')
+            logging.log(f"Interpreted dataset '{name}' as '{resolved_name}.'")
+            name = resolved_name
         self._name = name
         self._metadata = _MetadataDict(
             **source_info[name], dataset = name)
@@ -147,17 +159,70 @@ class DatasetMetadata(AgMLSerializable):
         self._citation_meta = _MetadataDict(
             **load_citation_sources()[name], dataset = name)
 
+        # Build the class mappings and image statistics.
+        self._build_class_mappings()
+        self._build_image_stats()
+
+    def _build_class_mappings(self):
+        """Builds the mappings between class numbers and class names.
+
+        These are constructed once when the metadata is loaded, rather
+        than each time that the corresponding properties are accessed.
+        """
+        mapping = self._metadata['classes']
+        self._has_nested_classes = has_nested_dicts(mapping)
+        if self._has_nested_classes:
+            self._num_to_class, self._class_to_num, self._classes = {}, {}, {}
+            for class_type, value in mapping.items():
+                if isinstance(value, dict):
+                    nums = [_class_number(i) for i in value]
+                    self._num_to_class[class_type] = dict(zip(nums, value.values()))
+                    self._class_to_num[class_type] = dict(zip(value.values(), nums))
+                    self._classes[class_type] = list(value.values())
+                else:
+                    self._num_to_class[class_type] = value
+                    self._class_to_num[class_type] = value
+            return
+
+        nums = [_class_number(i) for i in mapping]
+        self._num_to_class = dict(zip(nums, mapping.values()))
+        self._class_to_num = dict(zip(mapping.values(), nums))
+        self._classes = list(mapping.values())
+
+    def _build_image_stats(self):
+        """Converts the image statistics into `np.float32` arrays.
+
+        This is done once when the metadata is loaded, so that the mean
+        and inverse standard deviation (see `mean_f32` and `inv_std_f32`)
+        can be used directly for image normalization, without being
+        converted from lists on each use.
+        """
+        stats = self._metadata.get('stats', None)
+        if stats is None:
+            self._mean_f32, self._inv_std_f32 = None, None
+            return
+        self._mean_f32 = np.asarray(stats['mean'], dtype = np.float32)
+        self._inv_std_f32 = np.reciprocal(
+            np.asarray(stats['std'], dtype = np.float32))
+
+    def __setstate__(self, state):
+        # The `np.float32` image statistics are derived from the metadata,
+        # so they are rebuilt here rather than being serialized as well.
+        super(DatasetMetadata, self).__setstate__(state)
+        self._build_image_stats()
+
     def __getattr__(self, key):
-        try:
-            # Some weird behavior with lookups can happen.
-            return object.__getattribute__(self, key)
-        except:
-            if key in self._metadata.keys():
-                return self._metadata[key]
-            raise AttributeError(
-                maybe_you_meant(
-                    key, f"Received invalid info parameter: '{key}'.",
-                    source = self._metadata.keys()))
+        # This is only called once the regular attribute lookup has failed,
+        # so go directly to the metadata. The metadata is looked up in the
+        # instance dictionary to avoid recursing back into this method
+        # when it doesn't exist yet (e.g., while unpickling the object).
+        metadata = self.__dict__.get('_metadata')
+        if metadata is not None and key in metadata:
+            return metadata[key]
+        raise AttributeError(
+            maybe_you_meant(
+                key, f"Received invalid info parameter: '{key}'.",
+                source = metadata.keys() if metadata is not None else []))
 
     def __getitem__(self, key):
         return getattr(self, key)
@@ -188,6 +253,20 @@ class DatasetMetadata(AgMLSerializable):
         mean, std = self._metadata['stats'].values()
         return ImageStats(mean = mean, std = std)
 
+    @property
+    def mean_f32(self):
+        """Returns the mean of the RGB images as an `np.float32` array."""
+        if self._mean_f32 is None:
+            raise KeyError(f"The dataset '{self._name}' has no image statistics.")
+        return self._mean_f32
+
+    @property
+    def inv_std_f32(self):
+        """Returns the inverse standard deviation of the RGB images."""
+        if self._inv_std_f32 is None:
+            raise KeyError(f"The dataset '{self._name}' has no image statistics.")
+        return self._inv_std_f32
+
     @property
     def sensor_modality(self):
         return self._metadata['sensor_modality']
@@ -206,44 +285,19 @@ class DatasetMetadata(AgMLSerializable):
 
     @property
     def num_to_class(self):
-        mapping = self._metadata['classes']
-        if has_nested_dicts(mapping):
-            out = {}
-            for class_type in mapping.keys():
-                if isinstance(mapping[class_type], dict):
-                    nums = [int(float(i)) for i in mapping[class_type.keys()]]
-                    out[class_type] = dict(zip(nums, mapping[class_type].values()))
-                else:
-                    out[class_type] = mapping[class_type]
-            return out
-        nums = [int(float(i)) for i in mapping.keys()]
-        return dict(zip(nums, mapping.values()))
+        return self._num_to_class
 
     @property
     def class_to_num(self):
-        mapping = self._metadata['classes']
-        if has_nested_dicts(mapping):
-            out = {}
-            for class_type in mapping.keys():
-                if isinstance(mapping[class_type], dict):
-                    nums = [int(float(i)) for i in mapping[class_type].keys()]
-                    out[class_type] = dict(zip(mapping[class_type].values(), nums))
-                else:
-                    out[class_type] = mapping[class_type]
-            return out
-        nums = [int(float(i)) for i in mapping.keys()]
-        return dict(zip(mapping.values(), nums))
+        return self._class_to_num
 
     @property
     def classes(self):
-        classes = self._metadata['classes']
-        if has_nested_dicts(classes):
-            return {k: list(d.values()) for k, d in classes.items()}
-        return list(classes.values())
+        return self._classes
 
     @property
     def num_classes(self):
-        return len(self.classes)
+        return len(self._classes)
 
     @property
     def license(self):
@@ -272,8 +326,6 @@ class DatasetMetadata(AgMLSerializable):
         """
         def _bold(msg):
             return '\033[1m' + msg + '\033[0m'
-        def _bold_yaml(msg): # noqa
-            return '<|>' + msg + '<|>'
 
         _SWITCH_NAMES = {
             'ml_task': "Machine Learning Task",
@@ -283,7 +335,9 @@ class DatasetMetadata(AgMLSerializable):
             'docs_url': "Documentation"
         }
 
-        formatted_metadata = {}
+        # Each entry is dumped on its own so that the section name at
+        # the start of the entry can be directly bolded afterwards.
+        sections = []
         for key, value in self._metadata.items():
             name = key.replace('_', ' ').title()
             if key in _SWITCH_NAMES.keys():
@@ -292,12 +346,13 @@ class DatasetMetadata(AgMLSerializable):
                 value = {int(k): v for k, v in value.items()}
             if name == 'Number of Images':
                 value = int(value)
-            formatted_metadata[_bold_yaml(name)] = value
+            section = yaml.dump(
+                {name: value}, Dumper = _YAMLDumper, sort_keys = False)
+            if section.startswith(name + ':'):
+                section = _bold(name) + section[len(name):]
+            sections.append(section)
 
-        stream = io.StringIO()
-        yaml.dump(formatted_metadata, stream, sort_keys = False)
-        content = stream.getvalue()
-        content = re.sub('<\\|>(.*?)<\\|>', _bold(r'\1'), content)
+        content = ''.join(sections)
         header = '=' * 20 + ' DATASET SUMMARY ' + '=' * 20
         print(header)
         print(_bold("Name") + f": {self._name}")
@@ -325,7 +380,9 @@ class CustomDatasetMetadata(DatasetMetadata):
     extent of the rest of the metadata, and so this class is used
     to wrap the provided metadata and infer other arguments instead.
     """
-    serializable = frozenset(("name", "metadata"))
+    serializable = frozenset((
+        "name", "metadata", "num_to_class",
+        "class_to_num", "classes", "has_nested_classes"))
     is_custom_dataset = True
 
     def __init__(self, name, meta): # noqa
@@ -353,6 +410,8 @@ class CustomDatasetMetadata(DatasetMetadata):
             {'ml_task': meta['task'], 'ag_task': meta.get('ag_task', None),
              **meta}, dataset = name)
         self._metadata['classes'] = {str(i + 1): c for i, c in enumerate(meta['classes'])}
+        self._build_class_mappings()
+        self._build_image_stats()
 
         # There is no citation information necessary for custom datasets.
         self._citation_meta = None
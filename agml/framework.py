@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import copy
+from operator import attrgetter
 
 
 class AgMLSerializable(object):
@@ -46,11 +47,17 @@ class AgMLSerializable(object):
         if not hasattr(cls, 'state_override'):
             cls.state_override = frozenset(())
 
+        # The getters for the serializable attributes are built once
+        # per class, rather than every time an object is serialized.
+        cls._state_getters = tuple(
+            (param, attrgetter(f'_{param}'))
+            for param in getattr(cls, 'serializable', ()))
+
     def __getstate__(self):
         state = {}
-        for param in self.serializable:
+        for param, getter in self._state_getters:
             try:
-                state[param] = getattr(self, f'_{param}')
+                state[param] = getter(self)
             except AttributeError:
                 if param in self.state_override:
                     state[param] = getattr(self, param)
@@ -14,12 +14,15 @@
 
 import os
 import abc
+import functools
 from typing import List, Union, overload
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
 
 import torch
+import torch.nn as nn
 from pytorch_lightning import LightningModule
 
 from agml.framework import AgMLSerializable
@@ -28,21 +31,186 @@ from agml.backend.tftorch import is_array_like
 from agml.utils.image import imread_context
 from agml.utils.downloads import download_model
 from agml.models.benchmarks import BenchmarkMetadata
+from agml.models.tools import fused_preprocess, IMAGENET_MEAN, IMAGENET_STD
 
 
-class AgMLModelBase(AgMLSerializable, LightningModule):
-    """Base class for all AgML pretrained models.
+def _imread(path):
+    """Reads an image from a path.
 
-    All pretrained model variants in AgML inherit from this base class,
-    which provides common methods which each use, such as weight loading
-    and image input preprocessing, as well as other stubs for common methods.
+    Local files are read directly with `cv2.imread`, without the extra
+    overhead of `imread_context`. That context is only used as a fallback
+    when a path can't be read, to raise its more detailed error messages.
+    """
+    if os.path.isfile(path):
+        image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if image is not None:
+            return image
+    with imread_context(path) as image:
+        return image
+
+
+def _bgr_to_rgb(image):
+    """Converts a BGR(A) image to a contiguous RGB image."""
+    if image.ndim == 2:
+        return image
+    return np.ascontiguousarray(image[..., 2::-1])
+
+
+@functools.lru_cache(maxsize = None)
+def _image_loader_pool(pid): # noqa
+    """Returns the thread pool used to read images in parallel.
+
+    The pool is cached per process ID, since a pool which is inherited by
+    a forked process (e.g., a `DataLoader` worker) has no live threads.
+    """
+    return ThreadPoolExecutor(max_workers = os.cpu_count() or 1)
+
+
+def _read_image_batch(paths):
+    """Reads a list of image paths into one contiguous RGB image batch.
+
+    The first image is read to determine the shape of the batch, which is
+    then allocated once, and every image is color-converted directly into
+    its slot in the batch (rather than allocating a new array per image).
+    The BGR -> RGB conversion writes straight into that slot, so the batch
+    is only passed over once, rather than converting it after stacking.
+    If the images do not all share the same shape, then this falls back to
+    returning a list of individually converted images instead.
+
+    OpenCV releases the GIL while decoding images, so the remaining images
+    are read in parallel using a thread pool, one image per task.
+    """
+    first = _imread(paths[0])
+    if first.ndim != 3 or first.shape[-1] != 3:
+        return _read_image_list(paths)
+
+    batch = np.empty((len(paths), *first.shape), dtype = first.dtype)
+    cv2.cvtColor(first, cv2.COLOR_BGR2RGB, dst = batch[0])
+
+    def _read_into_batch(idx):
+        image = _imread(paths[idx])
+        # Images which don't match the shape of the batch are
+        # returned directly, and the batch is later unstacked.
+        if image.shape != first.shape or image.dtype != first.dtype:
+            return _bgr_to_rgb(image)
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst = batch[idx])
+        return None
+
+    mismatched = list(_image_loader_pool(os.getpid()).map(
+        _read_into_batch, range(1, len(paths))))
+    if all(image is None for image in mismatched):
+        return batch
+
+    # Non-uniform image sizes cannot be batched together, so
+    # return a list of the individual images in this case.
+    return [batch[0], *(batch[idx] if image is None else image
+                        for idx, image in enumerate(mismatched, 1))]
+
+
+def _batch_image_list(images):
+    """Copies a list of same-shape images into one contiguous image batch.
+
+    If the images are not all `np.ndarray`s of the same shape and type,
+    then the original list of images is returned instead.
+    """
+    first = images[0]
+    if not isinstance(first, np.ndarray) or first.ndim != 3:
+        return images
+    for image in images[1:]:
+        if not isinstance(image, np.ndarray) or \
+                image.shape != first.shape or image.dtype != first.dtype:
+            return images
+
+    batch = np.empty((len(images), *first.shape), dtype = first.dtype)
+    for image, dst in zip(images, batch):
+        dst[...] = image
+    return batch
+
+
+def _read_rgb_image(path):
+    """Reads a single image path into an RGB image."""
+    return _bgr_to_rgb(_imread(path))
+
+
+def _read_image_list(paths):
+    """Reads a list of image paths into a list of RGB images."""
+    return list(_image_loader_pool(os.getpid()).map(_read_rgb_image, paths))
+
+
+def _invalid_input_error(images):
+    """Returns the error raised for an invalid set of input images."""
+    return TypeError(
+        "Expected an input of a list of paths or images, a "
+        "single path or image, or a batched image tensor for "
+        f"preprocessing inputs, instead got {type(images)}.")
+
+
+def _expand_path(images):
+    """Expands a single image path into a batch of one RGB image.
+
+    Images which are not three-channel are returned in a list instead.
+    """
+    image = _imread(images)
+    if image.ndim != 3 or image.shape[-1] != 3:
+        return [_bgr_to_rgb(image), ]
+    batch = np.empty((1, *image.shape), dtype = image.dtype)
+    cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst = batch[0])
+    return batch
+
+
+def _expand_list(images):
+    """Expands a list of image paths or a list of images."""
+    if isinstance(images[0], str):
+        return _read_image_batch(images)
+    if is_array_like(images[0]):
+        return _batch_image_list(images)
+    raise _invalid_input_error(images)
+
+
+def _expand_array(images):
+    """Expands a single image or a batch of images."""
+    # If there is a single input image, just return this. If there is
+    # already a 4-dimensional batch of images, then keep the batch
+    # contiguous rather than unstacking it along the first dimension.
+    if images.ndim == 3:
+        return [images, ]
+    if images.ndim == 4:
+        return images
+    raise _invalid_input_error(images)
+
+
+# Maps the exact type of the input images to the method which expands them.
+_EXPAND_DISPATCH = {
+    str: _expand_path,
+    list: _expand_list,
+    np.ndarray: _expand_array,
+    torch.Tensor: _expand_array
+}
+
+
+class _AgMLInferenceBase(AgMLSerializable, nn.Module):
+    """Base class for the inference functionality of AgML models.
+
+    This contains everything that is needed to run inference with a
+    pretrained model, such as weight loading and image preprocessing,
+    on top of a plain `nn.Module`, without any of the training machinery
+    of a `LightningModule`. See `AgMLModelBase` for the full base class.
     """
 
     _ml_task: str
 
     def __init__(self):
         self._benchmark = BenchmarkMetadata(None)
-        super(AgMLModelBase, self).__init__()
+        super(_AgMLInferenceBase, self).__init__()
+
+        # The ImageNet normalization statistics (in the [0, 255] range) are
+        # kept as buffers, so that they move to the device with the model
+        # and on-device normalization doesn't need to copy them every batch.
+        # They aren't persistent, so they don't change saved state dicts.
+        self.register_buffer('_norm_mean', torch.tensor(
+            IMAGENET_MEAN).view(1, 3, 1, 1) * 255., persistent = False)
+        self.register_buffer('_norm_inv_std', 1. / (torch.tensor(
+            IMAGENET_STD).view(1, 3, 1, 1) * 255.), persistent = False)
 
     @property
     def original(self):
@@ -101,45 +269,167 @@ class AgMLModelBase(AgMLSerializable, LightningModule):
         inputs to a common format, in particular, a list of all of the
         images that are going to be then passed to the input preprocessing
         method, before being passed through the model for inference.
+
+        If the images all share the same shape (either a list of paths
+        to such images, or a list of such arrays), then these are instead
+        returned as one contiguous 4-dimensional batch array, which can be
+        iterated over in the same way as a list. An input which is already
+        a 4-dimensional batch is returned as-is, rather than being unstacked.
+
+        A single RGB image path, the common case for interactive inference,
+        is similarly read directly into a batch of one image, so that it
+        takes the same fast batched preprocessing path as a full batch.
         """
-        # First check for a path or a list of paths, for speed.
+        # Dispatch directly on the exact input type for the common
+        # cases, which avoids walking the full chain of type checks.
+        handler = _EXPAND_DISPATCH.get(type(images), None)
+        if handler is not None:
+            return handler(images)
+
+        # Otherwise, fall back to checking for subclasses of the input
+        # types (e.g., subclassed tensors, or TensorFlow tensors).
         if isinstance(images, str):
-            with imread_context(images) as image:
-                return [cv2.cvtColor(image, cv2.COLOR_BGR2RGB), ]
-        elif isinstance(images, list) and isinstance(images[0], str):
-            parsed_images = []
-            for path in images:
-                with imread_context(path) as image:
-                    parsed_images.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-            return parsed_images
-
-        # Then check if we already have read-in images, either one
-        # single image or a batch of images.
-        if is_array_like(images):
-            # Check if there is one single input image, or a batch of input
-            # images. If there is a single input image, just return this.
-            if images.ndim == 3:
-                return [images, ]
-
-            # Check if we have a batch of images first. This check is
-            # done by seeing if the input is 4-dimensional.
-            if images.ndim == 4:
-                # If so, unstack the images along the first dimension.
-                return [i for i in images]
-
-        # Finally, the only remaining viable input type is a list of images.
-        if isinstance(images, list) and is_array_like(images[0]):
-            return images
+            return _expand_path(images)
+        if isinstance(images, list):
+            return _expand_list(images)
+        if is_array_like(images, no_list = True):
+            return _expand_array(images)
+        raise _invalid_input_error(images)
 
-        # Otherwise, we need to raise an error.
-        raise TypeError(
-            "Expected an input of a list of paths or images, a "
-            "single path or image, or a batched image tensor for "
-            f"preprocessing inputs, instead got {type(images)}.")
+    @staticmethod
+    def _expand_input_images_batched(images):
+        """Expands the input images, and reports if they are a single batch.
+
+        This is the same as `_expand_input_images`, but also returns whether
+        the expanded images are one contiguous 4-dimensional `np.ndarray`,
+        in which case they can be preprocessed as a whole batch without
+        having to be restacked first, as opposed to a list of images.
+        """
+        images = _AgMLInferenceBase._expand_input_images(images)
+        return images, isinstance(images, np.ndarray) and images.ndim == 4
 
     @staticmethod
-    def _to_out(tensor: "torch.Tensor") -> "torch.Tensor":
-        return tensor.detach().cpu().numpy()
+    def _expand_input_images_gpu(images, device):
+        """Expands the input images into `uint8` tensors on the given device.
+
+        This is an alternative to `_expand_input_images` for models which run
+        on a GPU, so that further preprocessing (resizing, normalization) can
+        be done on the device rather than on the CPU. Image paths are decoded
+        with `torchvision.io`, which decodes directly to RGB (so there is no
+        channel reordering needed), and already loaded `uint8` images are
+        copied to the device in one single transfer.
+
+        Returns a [N, C, H, W] tensor if all of the images share the same
+        shape, otherwise a list of [C, H, W] tensors. If the inputs are not
+        8-bit RGB images, or are image files which `torchvision.io` can't
+        decode (e.g., BMP or TIFF images), then this returns `None`, in which
+        case the regular CPU preprocessing pipeline should be used instead.
+        """
+        if isinstance(images, str):
+            images = [images, ]
+        if isinstance(images, list) and isinstance(images[0], str):
+            from torchvision.io import read_file, decode_image, ImageReadMode
+            try:
+                images = [decode_image(read_file(path), mode = ImageReadMode.RGB)
+                          for path in images]
+            except RuntimeError: # unsupported image format
+                return None
+            if all(image.shape == images[0].shape for image in images):
+                return torch.stack(images).to(device, non_blocking = True)
+            return [image.to(device, non_blocking = True) for image in images]
+
+        images = _AgMLInferenceBase._expand_input_images(images)
+        if isinstance(images, np.ndarray) and images.ndim == 4 \
+                and images.dtype == np.uint8 and images.shape[-1] == 3:
+            images = torch.from_numpy(images).to(device, non_blocking = True)
+            return images.permute(0, 3, 1, 2)
+        return None
+
+    @staticmethod
+    def _map_images(fn, images):
+        """Applies a function to each of the images, in parallel for batches.
+
+        Resizing and most of the NumPy operations in the image preprocessing
+        release the GIL, so larger batches are mapped over the same thread
+        pool as is used to read images. For only a few images, the overhead
+        of the thread pool isn't worth it, and they are processed directly.
+        """
+        if len(images) <= 4:
+            return [fn(image) for image in images]
+        return list(_image_loader_pool(os.getpid()).map(fn, images))
+
+    @staticmethod
+    def _fused_preprocess(images, mean, std, out = None) -> "torch.Tensor":
+        """Normalizes a `uint8` [N, H, W, C] batch into a [N, C, H, W] tensor.
+
+        The `mean` and `std` should be given in the range [0, 1] (e.g., the
+        ImageNet statistics), and are rescaled here to the [0, 255] range of
+        the images, so that scaling, normalization, and the channels-first
+        transpose are all applied in one pass (see `fused_preprocess`).
+        If an `out` tensor is given, the batch is written directly into it.
+        """
+        mean = np.asarray(mean, dtype = np.float32) * 255.
+        inv_std = 1. / (np.asarray(std, dtype = np.float32) * 255.)
+        if out is None:
+            return torch.from_numpy(fused_preprocess(images, mean, inv_std))
+        fused_preprocess(images, mean, inv_std, out = out.numpy())
+        return out
+
+    def _to_out(self, tensor: "torch.Tensor") -> "torch.Tensor":
+        if not tensor.is_cuda:
+            return tensor.detach().cpu().numpy()
+
+        # Outputs on a GPU are copied into a reusable page-locked buffer,
+        # which is both faster than a copy into freshly allocated pageable
+        # memory and avoids allocating a new host buffer for every call.
+        buffer = getattr(self, '_out_buffer', None)
+        if buffer is None or buffer.shape != tensor.shape \
+                or buffer.dtype != tensor.dtype:
+            buffer = torch.empty(tensor.shape, dtype = tensor.dtype, pin_memory = True)
+            self._out_buffer = buffer
+        buffer.copy_(tensor.detach(), non_blocking = True)
+        torch.cuda.current_stream(tensor.device).synchronize()
+        return buffer.numpy().copy()
+
+    def _input_buffer(self, n, size = None) -> "torch.Tensor":
+        """Returns a reusable [n, 3, H, W] buffer for preprocessed inputs.
+
+        The buffer is only reallocated when a larger batch or a different
+        image size is needed, and is otherwise sliced to the batch size. It
+        is in the channels-last layout the models run in, so that it doesn't
+        need another copy before the forward pass, and is page-locked when
+        the model is on a GPU, so that it can be copied there asynchronously.
+        """
+        # Wait for the previous inputs to have been copied out of the buffer
+        # (see `_input_buffer_copied()`), before they can be overwritten.
+        copied = getattr(self, '_in_buffer_copied', None)
+        if copied is not None:
+            copied.synchronize()
+            self._in_buffer_copied = None
+
+        # The device is that of the normalization buffers, since a plain
+        # `nn.Module` (unlike a `LightningModule`) has no `device` attribute.
+        h, w = size if size is not None else (224, 224)
+        buffer = getattr(self, '_in_buffer', None)
+        if buffer is None or len(buffer) < n or buffer.shape[2:] != (h, w):
+            buffer = torch.empty(
+                (n, 3, h, w), dtype = torch.float32,
+                pin_memory = self._norm_mean.is_cuda).contiguous(
+                memory_format = torch.channels_last)
+            self._in_buffer = buffer
+        return buffer[:n]
+
+    def _input_buffer_copied(self):
+        """Records that the input buffer is being copied to the GPU.
+
+        The copy from the page-locked buffer runs asynchronously, so the
+        next call to `_input_buffer()` waits for it to have finished before
+        returning the buffer, rather than overwriting it in the meantime.
+        """
+        if self._norm_mean.is_cuda:
+            self._in_buffer_copied = torch.cuda.Event()
+            self._in_buffer_copied.record(
+                torch.cuda.current_stream(self._norm_mean.device))
 
     @staticmethod
     def _get_shapes(images: list) -> list:
@@ -185,20 +475,86 @@ class AgMLModelBase(AgMLSerializable, LightningModule):
         """Evaluates the model on the given loader."""
         raise NotImplementedError
 
+
+class AgMLModelBase(_AgMLInferenceBase, LightningModule):
+    """Base class for all AgML pretrained models.
+
+    All pretrained model variants in AgML inherit from this base class,
+    which provides common methods which each use, such as weight loading
+    and image input preprocessing, as well as other stubs for common methods.
+
+    The inference functionality is inherited from `_AgMLInferenceBase`,
+    while this class adds the `LightningModule` used for training.
+    """
+
     @abc.abstractmethod
     def _prepare_for_training(self, **kwargs):
         """Prepares the model for training (setting parameters, etc.)"""
         raise NotImplementedError
 
+    def _log_epoch_metrics(self, prefix = ''):
+        """Logs the metrics accumulated over an epoch, then resets them.
+
+        The `*_step` methods only update the metrics, so that they are
+        computed once per epoch here (rather than on every single step,
+        which would force a device synchronization every step). The legacy
+        models log their metrics in each step instead (and don't flag that
+        they have been updated), so theirs are only reset here.
+        """
+        if self._ml_task == 'object_detection':
+            return
+        log_metrics = getattr(self, '_metrics_updated', False)
+        for metric_name, metric in self._named_metrics():
+            if log_metrics:
+                self.log(prefix + metric_name,
+                         metric.compute().squeeze(), prog_bar = True)
+            metric.reset()
+        self._metrics_updated = False
+
+    def _named_metrics(self):
+        """Returns the `(name, metric)` pairs of the model's metrics.
+
+        The metrics are stored in a dictionary, but the legacy models still
+        store them as a list of `[name, metric]` pairs (or bare metrics).
+        """
+        metrics = getattr(self, '_metrics', {})
+        if isinstance(metrics, dict):
+            return list(metrics.items())
+        return [tuple(metric) if isinstance(metric, (list, tuple))
+                else (metric.__class__.__name__, metric) for metric in metrics]
+
+    def _metrics_to_device(self):
+        """Moves the metrics to the device of the model.
+
+        The metrics are stored in a plain dictionary, so they aren't moved
+        along with the model; this is done once when each stage starts,
+        rather than in each of the `*_step` methods.
+        """
+        for _, metric in self._named_metrics():
+            metric.to(self.device)
+
+    def on_train_start(self):
+        self._metrics_to_device()
+
+    def on_validation_start(self):
+        self._metrics_to_device()
+
+    def on_test_start(self):
+        self._metrics_to_device()
+
     def on_train_epoch_end(self):
-        if self._ml_task != 'object_detection':
-            for _, metric in self._metrics:
-                metric.reset()
+        self._log_epoch_metrics()
+
+    def on_validation_epoch_start(self):
+        # Validation runs before the end of the training epoch, and uses
+        # the same metrics, so the training metrics are logged beforehand.
+        self._log_epoch_metrics()
 
     def on_validation_epoch_end(self):
-        if self._ml_task != 'object_detection':
-            for _, metric in self._metrics:
-                metric.reset()
+        self._log_epoch_metrics('val_')
+
+    def on_test_epoch_end(self):
+        self._log_epoch_metrics('test_')
 
     def get_progress_bar_dict(self):
         if not hasattr(super(), 'get_progress_bar_dict'):
@@ -12,10 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
 from tqdm import tqdm
 
+import numpy as np
+
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
 try:
     from torchvision.models import efficientnet_b4
@@ -25,9 +30,12 @@ except ImportError:
                       "running `pip install torchvision`.")
 
 from agml.models.base import AgMLModelBase
-from agml.models.tools import auto_move_data, imagenet_style_process
+from agml.models.tools import (
+    auto_move_data, imagenet_style_process, resize_image_batch,
+    torch_compile_available, get_classification_metric, get_optimizer,
+    IMAGENET_MEAN, IMAGENET_STD
+)
 from agml.models.metrics.accuracy import Accuracy
-from agml.utils.general import has_func
 
 
 class EfficientNetB4Transfer(nn.Module):
@@ -37,14 +45,20 @@ class EfficientNetB4Transfer(nn.Module):
         self.base = efficientnet_b4(pretrained = False)
         self.l1 = nn.Linear(1000, 256)
         self.dropout = nn.Dropout(0.1)
-        self.relu = nn.ReLU()
+        self.relu = nn.ReLU(inplace = True)
         self.l2 = nn.Linear(256, num_classes)
 
+    def forward_features(self, x):
+        """Runs the EfficientNet backbone, returning (N, 1000) features."""
+        return self.base(x)
+
+    def forward_head(self, features):
+        """Runs the classification head on the backbone features."""
+        return self.l2(self.dropout(self.relu(self.l1(features))))
+
     def forward(self, x, **kwargs): # noqa
-        x = self.base(x)
-        x = x.view(x.size(0), -1)
-        x = self.dropout(self.relu(self.l1(x)))
-        return self.l2(x)
+        # The base network already outputs flat (N, 1000) features.
+        return self.forward_head(self.forward_features(x))
 
 
 class ClassificationModel(AgMLModelBase):
@@ -78,18 +92,71 @@ class ClassificationModel(AgMLModelBase):
         # Construct the network and load in pretrained weights.
         super(ClassificationModel, self).__init__()
         self._regression = regression
+        self._trt_context = None
+        self._compiled_nets = {}
         if not kwargs.get('model_initialized', False):
             self._num_classes = num_classes
             self.net = self._construct_sub_net(num_classes)
 
+            # The convolutions of EfficientNet run fastest in the NHWC
+            # (channels last) layout, in particular with AMP on a GPU.
+            self.net = self.net.to(memory_format = torch.channels_last)
+
     @auto_move_data
     def forward(self, batch):
-        return self.net(batch)
+        # Inference is run through the TensorRT engine, if one has been
+        # built (see `to_tensorrt()`) and the batch matches its input size.
+        if self._trt_context is not None and not self.training \
+                and tuple(batch.shape[1:]) == (3, 224, 224):
+            return self._trt_forward(batch)
+        return self._net_for(batch)(batch)
+
+    def _net_for(self, batch):
+        """Returns the network to run the batch through, compiled on a GPU.
+
+        The network is compiled the first time it is used on a GPU, which
+        removes the per-operation Python overhead (in particular for small
+        batches). Inference uses the `reduce-overhead` mode (CUDA graphs),
+        which doesn't suit training, so training uses the default mode. All
+        inputs are resized to (N, 3, 224, 224), so the graph is compiled for
+        static shapes rather than generic dynamic-shape kernels. `self.net`
+        itself is left uncompiled, so its state dict keys don't change.
+        """
+        if batch.device.type != 'cuda' or not torch_compile_available():
+            return self.net
+        mode = 'default' if self.training else 'reduce-overhead'
+        if mode not in self._compiled_nets:
+            self._compiled_nets[mode] = torch.compile(
+                self.net, mode = mode, dynamic = False)
+        return self._compiled_nets[mode]
 
     @staticmethod
     def _construct_sub_net(num_classes):
         return EfficientNetB4Transfer(num_classes)
 
+    @torch.inference_mode()
+    def warmup(self, batch_size = 1):
+        """Runs a dummy batch through the network to prepare it for inference.
+
+        When the network is compiled, it is only actually compiled (and its
+        CUDA graphs recorded) on the first call with a new input shape, which
+        is slow. Calling this after moving the model to its device, with the
+        batch size which will be used, moves this cost out of `predict()`.
+
+        Parameters
+        ----------
+        batch_size : int
+            The batch size to prepare the network for.
+        """
+        self.eval()
+        dummy = torch.zeros(
+            (batch_size, 3, 224, 224), device = self.device).to(
+            memory_format = torch.channels_last)
+        with torch.autocast('cuda', dtype = torch.float16,
+                            enabled = self.device.type == 'cuda'):
+            self(dummy)
+        return self
+
     @staticmethod
     def _preprocess_image(image, **kwargs):
         """Preprocesses a single input image to EfficientNet standards.
@@ -111,7 +178,7 @@ class ClassificationModel(AgMLModelBase):
         return imagenet_style_process(image, **kwargs)
 
     @staticmethod
-    def preprocess_input(images = None, **kwargs) -> "torch.Tensor":
+    def preprocess_input(images = None, out = None, **kwargs) -> "torch.Tensor":
         """Preprocesses the input image to the specification of the model.
 
         This method takes in a set of inputs and preprocesses them into the
@@ -143,16 +210,78 @@ class ClassificationModel(AgMLModelBase):
                 4. A list of images (List[np.ndarray, torch.Tensor])
                 5. A batched tensor of images (np.ndarray, torch.Tensor)
 
+            A `float32` tensor batch which is already in the input format of
+            the model, [N, 3, H, W] with the model's input size (224 x 224 by
+            default), is treated as already preprocessed and returned as-is.
+        out : torch.Tensor
+            An optional [N, 3, H, W] tensor with the same batch size as the
+            inputs, which the preprocessed images are directly written into
+            (rather than being stacked into a newly allocated tensor).
+
         Returns
         -------
         A 4-dimensional, preprocessed `torch.Tensor`.
         """
-        images = ClassificationModel._expand_input_images(images)
-        return torch.stack(
-            [ClassificationModel._preprocess_image(
-                image, **kwargs) for image in images], dim = 0)
+        size = kwargs.get('size', None) or (224, 224)
+        if isinstance(images, torch.Tensor) and images.dtype == torch.float32 \
+                and images.ndim == 4 and images.shape[1:] == (3, *size):
+            return images
+
+        images, is_batched = ClassificationModel._expand_input_images_batched(images)
+
+        # A contiguous batch of 8-bit RGB images can be resized, normalized,
+        # and transposed as a whole batch, rather than image-by-image. A list
+        # of differently-sized 8-bit RGB images is first resized into such a
+        # batch, which avoids converting each image to `float32` and then
+        # restacking the separately processed images.
+        if is_batched:
+            is_uint8_rgb = images.dtype == np.uint8 and images.shape[-1] == 3
+        else:
+            is_uint8_rgb = all(
+                isinstance(image, np.ndarray) and image.dtype == np.uint8
+                and image.ndim == 3 and image.shape[-1] == 3 for image in images)
+        if is_uint8_rgb and kwargs.get('normalize', True):
+            return ClassificationModel._fused_preprocess(
+                resize_image_batch(images, kwargs.get('size', None)),
+                IMAGENET_MEAN, IMAGENET_STD, out = out)
+        processed = ClassificationModel._map_images(
+            lambda image: ClassificationModel._preprocess_image(
+                image, **kwargs), images)
+        if out is None:
+            return torch.stack(processed, dim = 0)
+        for image, dst in zip(processed, out):
+            dst.copy_(image)
+        return out
+
+    def _preprocess_input_gpu(self, images, **kwargs):
+        """Preprocesses the input images on the device of the model.
 
-    @torch.no_grad()
+        This is the GPU counterpart to `preprocess_input()`: the images are
+        decoded or copied to the device as `uint8` tensors, and resizing and
+        normalization are then run as batched operations on the device. If
+        the inputs can't be handled on the device (e.g., they aren't 8-bit
+        images), then this returns `None` (see `_expand_input_images_gpu`).
+        """
+        images = self._expand_input_images_gpu(images, self.device)
+        if images is None:
+            return None
+
+        h = w = 224
+        if kwargs.get('size', None) is not None:
+            h, w = kwargs['size']
+        if isinstance(images, list):
+            images = torch.cat([F.interpolate(
+                image[None].float(), size = (h, w), mode = 'bilinear',
+                align_corners = False) for image in images], dim = 0)
+        elif images.shape[-2:] != (h, w):
+            images = F.interpolate(images.float(), size = (h, w),
+                                   mode = 'bilinear', align_corners = False)
+        else:
+            images = images.float()
+
+        return images.sub_(self._norm_mean).mul_(self._norm_inv_std)
+
+    @torch.inference_mode()
     def predict(self, images, **kwargs):
         """Runs `EfficientNetB4` inference on the input image(s).
 
@@ -178,39 +307,257 @@ class ClassificationModel(AgMLModelBase):
         -------
         A `np.ndarray` with integer labels for each image.
         """
-        images = self.preprocess_input(images, **kwargs)
-        out = self.forward(images)
+        # When running on a GPU, preprocess the images on the device.
+        processed = None
+        if self.device.type == 'cuda' and kwargs.get('normalize', True):
+            processed = self._preprocess_input_gpu(images, **kwargs)
+        if processed is None:
+            # The images are preprocessed into a reusable input buffer,
+            # which is then copied to the device (asynchronously).
+            images = self._expand_input_images(images)
+            processed = self.preprocess_input(
+                images, out = self._input_buffer(
+                    len(images), kwargs.get('size', None)), **kwargs)
+            processed = processed.to(self.device, non_blocking = True)
+            self._input_buffer_copied()
+        processed = processed.contiguous(memory_format = torch.channels_last)
+
+        # On a GPU, run the forward pass with mixed precision, which
+        # lets the convolutions and linear layers use Tensor Cores.
+        if self.device.type == 'cuda':
+            with torch.autocast('cuda', dtype = torch.float16):
+                out = self.forward(processed)
+            out = out.float()
+        else:
+            out = self.forward(processed)
+        if not self._regression: # standard classification
+            out = torch.argmax(out, 1)
+        if not kwargs.get('return_tensor_output', False):
+            return self._to_out(torch.squeeze(out))
+        return out
+
+    @torch.inference_mode()
+    def extract_features(self, images, **kwargs):
+        """Extracts the `EfficientNetB4` backbone features of the input image(s).
+
+        This runs only the backbone of the model, which is by far the most
+        expensive part of it, and returns its (N, 1000) output features. These
+        can be computed once and then reused, for instance to evaluate several
+        classification heads trained on the same backbone, or for any other
+        downstream use of the features, by passing them to `predict_features()`.
+
+        Parameters
+        ----------
+        images : Any
+            See `preprocess_input()` for the allowed input images.
+
+        Returns
+        -------
+        A `np.ndarray` with the features of each image.
+        """
+        processed = self.preprocess_input(images, **kwargs)
+        processed = processed.to(
+            self.device, memory_format = torch.channels_last, non_blocking = True)
+        features = self.net.forward_features(processed)
+        if not kwargs.get('return_tensor_output', False):
+            return self._to_out(features)
+        return features
+
+    @torch.inference_mode()
+    def predict_features(self, features, **kwargs):
+        """Runs the classification head on features from `extract_features()`.
+
+        Parameters
+        ----------
+        features : {np.ndarray, torch.Tensor}
+            The (N, 1000) backbone features of the images.
+
+        Returns
+        -------
+        A `np.ndarray` with integer labels for each image.
+        """
+        features = torch.as_tensor(features, device = self.device)
+        out = self.net.forward_head(features)
         if not self._regression: # standard classification
             out = torch.argmax(out, 1)
         if not kwargs.get('return_tensor_output', False):
             return self._to_out(torch.squeeze(out))
         return out
 
+    def to_int8_cpu(self):
+        """Quantizes the classification head to INT8 for CPU inference.
+
+        The `nn.Linear` layers of the classification head are dynamically
+        quantized to INT8 (the weights are quantized ahead of time, and the
+        activations on the fly), which makes them faster on a CPU with a
+        negligible change in the outputs. The model is moved to the CPU and
+        `predict()` then runs with the quantized head. This should be called
+        after any weights are loaded, since the quantized layers store their
+        weights in a different format, and the model can't be trained after.
+
+        The EfficientNet backbone is kept in full precision, since eager-mode
+        static quantization of it would need its blocks rewritten with
+        quantization stubs and a calibration pass over representative data.
+
+        Returns
+        -------
+        The `ClassificationModel` itself, now with a quantized head.
+        """
+        self.to('cpu')
+        torch.ao.quantization.quantize_dynamic(
+            self.net, {nn.Linear}, dtype = torch.qint8, inplace = True)
+        return self
+
+    def to_tensorrt(self, engine_path, precision = 'fp16', max_batch = 32):
+        """Builds a TensorRT engine which is then used for inference.
+
+        The network is exported to ONNX (next to `engine_path`), and then
+        built into a TensorRT engine for (N, 3, 224, 224) inputs with a batch
+        size of up to `max_batch`, which is saved to `engine_path`. After this,
+        `forward()` (and thus `predict()`) runs through the engine whenever the
+        model is in evaluation mode and the inputs are of that size; larger
+        batches are run through the engine in chunks of `max_batch` images.
+
+        This requires an NVIDIA GPU, as well as the `tensorrt` and `onnx`
+        packages. The engine's inputs and outputs are the model's own CUDA
+        tensors, so no extra host buffers or copies are needed for them.
+
+        Parameters
+        ----------
+        engine_path : str
+            The path to save the serialized TensorRT engine to.
+        precision : str
+            The precision to build the engine with, one of `fp32`, `fp16`,
+            or `bf16` (the inputs and outputs are always `float32`).
+        max_batch : int
+            The largest batch size the engine is built to handle.
+
+        Returns
+        -------
+        The `ClassificationModel` itself, now running with TensorRT.
+        """
+        try:
+            import tensorrt as trt
+        except ImportError:
+            raise ImportError("To build a TensorRT engine for a model, you need "
+                              "to install TensorRT first. You can do this by "
+                              "running `pip install tensorrt`.")
+        if not torch.cuda.is_available():
+            raise RuntimeError("Building a TensorRT engine requires a CUDA GPU.")
+        if precision not in ['fp32', 'fp16', 'bf16']:
+            raise ValueError(f"Got an invalid precision '{precision}', expected "
+                             f"one of `fp32`, `fp16`, or `bf16`.")
+
+        # Export the network to ONNX, with a dynamic batch dimension.
+        onnx_path = os.path.splitext(engine_path)[0] + '.onnx'
+        self.net.eval()
+        torch.onnx.export(
+            self.net, (torch.randn(1, 3, 224, 224, device = self.device), ), onnx_path,
+            input_names = ['images'], output_names = ['logits'],
+            dynamic_axes = {'images': {0: 'batch'}, 'logits': {0: 'batch'}},
+            dynamo = False)
+
+        # Build the TensorRT engine from the ONNX network.
+        logger = trt.Logger(trt.Logger.WARNING)
+        builder = trt.Builder(logger)
+        network = builder.create_network(
+            1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH))
+        parser = trt.OnnxParser(network, logger)
+        if not parser.parse_from_file(onnx_path):
+            errors = [str(parser.get_error(i)) for i in range(parser.num_errors)]
+            raise RuntimeError(
+                "Failed to parse the exported ONNX network: " + '; '.join(errors))
+        config = builder.create_builder_config()
+        if precision == 'fp16':
+            config.set_flag(trt.BuilderFlag.FP16)
+        elif precision == 'bf16':
+            config.set_flag(trt.BuilderFlag.BF16)
+        profile = builder.create_optimization_profile()
+        profile.set_shape('images', (1, 3, 224, 224),
+                          (max_batch, 3, 224, 224), (max_batch, 3, 224, 224))
+        config.add_optimization_profile(profile)
+        serialized = builder.build_serialized_network(network, config)
+        if serialized is None:
+            raise RuntimeError("Failed to build the TensorRT engine.")
+        with open(engine_path, 'wb') as f:
+            f.write(serialized)
+
+        # Load the engine, which is then used in `forward()`.
+        engine = trt.Runtime(logger).deserialize_cuda_engine(serialized)
+        self._trt_engine = engine
+        self._trt_context = engine.create_execution_context()
+        self._trt_max_batch = max_batch
+        return self
+
+    def _trt_forward(self, batch):
+        """Runs a batch of images through the TensorRT engine."""
+        batch = batch.to('cuda', dtype = torch.float32).contiguous()
+        out = torch.empty((len(batch), self._trt_engine.get_tensor_shape('logits')[-1]),
+                          dtype = torch.float32, device = batch.device)
+        stream = torch.cuda.current_stream(batch.device).cuda_stream
+        for start in range(0, len(batch), self._trt_max_batch):
+            chunk = batch[start: start + self._trt_max_batch]
+            self._trt_context.set_input_shape('images', tuple(chunk.shape))
+            self._trt_context.set_tensor_address('images', chunk.data_ptr())
+            self._trt_context.set_tensor_address(
+                'logits', out[start: start + len(chunk)].data_ptr())
+            self._trt_context.execute_async_v3(stream)
+        return out
+
     def evaluate(self, loader, **kwargs):
         """Runs an accuracy evaluation on the given loader.
 
         This method will loop over the `AgMLDataLoader` and compute accuracy.
+        The data is run through the model in batches of `batch_size` images
+        (which is set on a copy of the loader), rather than image-by-image.
 
         Parameters
         ----------
         loader : AgMLDataLoader
-            A semantic segmentation loader with the dataset you want to evaluate.
+            An image classification loader with the dataset you want to evaluate.
+        kwargs : dict
+            batch_size : int
+                The number of images to run through the model at once (16 by
+                default). If this is `None`, the loader is used as-is.
 
         Returns
         -------
         The final calculated accuracy.
         """
-        # Construct the metric and run the calculations.
-        acc = Accuracy()
+        # Batch the data, so that the model predicts on a full
+        # batch of images at once, rather than image-by-image.
+        batch_size = kwargs.pop('batch_size', 16)
+        if batch_size is not None and hasattr(loader, 'batch'):
+            loader = loader.copy()
+            loader.batch(batch_size = batch_size)
+
+        # Construct the metric and run the calculations. The predictions
+        # are kept on the model's device (rather than being copied back to
+        # the host every batch), and the truths are moved to the device.
+        acc = Accuracy().to(self.device)
+        kwargs['return_tensor_output'] = True
         bar = tqdm(loader, desc = "Calculating Accuracy")
+        correct, total = 0, 0
         for sample in bar:
-            image, truth = sample
-            pred_label = self.predict(image, return_tensor_out = True, **kwargs)
-            acc.update(pred_label, truth)
-            bar.set_postfix({'accuracy': acc.compute().numpy().item()})
+            images, truths = sample
+            pred_labels = torch.atleast_1d(self.predict(images, **kwargs))
+            truths = torch.as_tensor(np.asarray(truths), device = self.device)
+
+            # The truths are converted to class indices, with one row per
+            # prediction (so that the one-hot label of a single, unbatched
+            # image is converted the same way as a batch of one-hot labels).
+            truths = self._class_indices(
+                truths.reshape(len(pred_labels), -1)).reshape(-1)
+            acc.update(pred_labels, truths)
+
+            # Show a running accuracy, rather than recomputing the
+            # accuracy over all of the accumulated data every batch.
+            correct += (pred_labels == truths).sum()
+            total += len(truths)
+            bar.set_postfix({'accuracy': correct.item() / total})
 
         # Compute the final accuracy.
-        return acc.compute().numpy().item()
+        return acc.compute().cpu().numpy().item()
 
     def run_training(self,
                      dataset=None,
@@ -357,55 +704,44 @@ class ClassificationModel(AgMLModelBase):
                     f"Expected a callable loss function, but got '{type(loss)}'.")
 
         # Initialize the metrics.
-        metric_collection = []
-        if len(metrics) > 0:
-            for metric in metrics:
-                # Check if it is a valid torchmetrics metric.
-                if isinstance(metric, str):
-                    try:
-                        from torchmetrics import classification as class_metrics
-                    except ImportError:
-                        raise ImportError(
-                            "Received the name of a metric. If you want to use named "
-                            "metrics, then you need to have `torchmetrics` installed. "
-                            "You can do this by running `pip install torchmetrics`.")
-
-                    # Check if `torchmetrics.classification` has the metric.
-                    if has_func(class_metrics, metric):
-                        # accuracy is a special case, we use our own accuracy
-                        if metric == 'accuracy':
-                            from agml.models.metrics.accuracy import Accuracy
-                            metric_collection.append(['accuracy', Accuracy()])
-
-                        # convert to camel case
-                        else:
-                            metric = ''.join([word.capitalize() for word in metric.split('_')])
-                            metric_collection.append([metric, getattr(class_metrics, metric)()])
-                    else:
-                        raise ValueError(
-                            f"Expected a valid metric torchmetrics metric name, "
-                            f"but got '{metric}'. Check `torchmetrics.classification` "
-                            f"for a list of valid image classification metrics.")
-
-                # Check if it is any other class.
-                elif isinstance(metric, nn.Module):
-                    metric_collection.append(metric)
-
-                # Otherwise, raise an error.
-                else:
-                    raise TypeError(
-                        f"Expected a metric name or a metric class, but got '{type(metric)}'.")
+        metric_collection = {}
+        for metric in metrics:
+            # Check if it is a valid torchmetrics metric.
+            if isinstance(metric, str):
+                # accuracy is a special case, we use our own accuracy
+                if metric == 'accuracy':
+                    metric_collection['accuracy'] = Accuracy()
+                    continue
+
+                # Check if `torchmetrics.classification` has the metric.
+                metric_class = get_classification_metric(metric)
+                if metric_class is None:
+                    raise ValueError(
+                        f"Expected a valid metric torchmetrics metric name, "
+                        f"but got '{metric}'. Check `torchmetrics.classification` "
+                        f"for a list of valid image classification metrics.")
+                metric_collection[metric_class.__name__] = metric_class()
+
+            # Check if it is any other class.
+            elif isinstance(metric, nn.Module):
+                metric_collection[metric.__class__.__name__] = metric
+
+            # Otherwise, raise an error.
+            else:
+                raise TypeError(
+                    f"Expected a metric name or a metric class, but got '{type(metric)}'.")
         self._metrics = metric_collection
 
         # Initialize the optimizer/learning rate scheduler.
         if isinstance(optimizer, str):
-            optimizer_class = optimizer.capitalize()
-            if not has_func(torch.optim, optimizer_class):
+            # Optimizer names are matched case-insensitively (e.g., `sgd`).
+            optimizer_class = get_optimizer(optimizer)
+            if optimizer_class is None:
                 raise ValueError(
-                    f"Expected a valid optimizer name, but got '{optimizer_class}'. "
+                    f"Expected a valid optimizer name, but got '{optimizer}'. "
                     f"Check `torch.optim` for a list of valid optimizers.")
 
-            optimizer = getattr(torch.optim, optimizer_class)(
+            optimizer = optimizer_class(
                 self.parameters(), lr = kwargs.get('lr', 1e-3))
         elif isinstance(optimizer, torch.optim.Optimizer):
             pass  # nothing to do
@@ -436,15 +772,29 @@ class ClassificationModel(AgMLModelBase):
             return opt
         return [opt], [scheduler]
 
+    @staticmethod
+    def _class_indices(y):
+        """Converts one-hot labels into class indices, once per batch.
+
+        Both the loss and the metrics then receive the class indices (which
+        is what `nn.CrossEntropyLoss` and `Accuracy` expect), rather than
+        each of them converting one-hot labels on its own.
+        """
+        if y.ndim > 1 and y.shape[1] > 1:
+            return torch.argmax(y, 1)
+        return y
+
     def training_step(self, batch, *args, **kwargs): # noqa
         x, y = batch
+        y = self._class_indices(y)
         y_pred = self(x)
 
         # Compute metrics and loss.
         loss = self.loss(y_pred, y)
-        for metric_name, metric in self._metrics:
+        self.log('loss', loss, prog_bar = True, on_step = True, on_epoch = True)
+        for metric in self._metrics.values():
             metric.update(y_pred, y)
-            self.log(metric_name, self._to_out(metric.compute()).item(), prog_bar = True)
+        self._metrics_updated = True
 
         return {
             'loss': loss,
@@ -452,15 +802,15 @@ class ClassificationModel(AgMLModelBase):
 
     def validation_step(self, batch, *args, **kwargs): # noqa
         x, y = batch
+        y = self._class_indices(y)
         y_pred = self.net(x)
 
         # Compute metrics and loss.
         val_loss = self.loss(y_pred, y)
-        self.log('val_loss', val_loss.item(), prog_bar = True)
-        for metric_name, metric in self._metrics:
-            metric.to(self.device)
+        self.log('val_loss', val_loss, prog_bar = True)
+        for metric in self._metrics.values():
             metric.update(y_pred, y)
-            self.log('val_' + metric_name, self._to_out(metric.compute()).item(), prog_bar = True)
+        self._metrics_updated = True
 
         return {
             'val_loss': val_loss,
@@ -468,15 +818,15 @@ class ClassificationModel(AgMLModelBase):
 
     def test_step(self, batch, *args, **kwargs):
         x, y = batch
+        y = self._class_indices(y)
         y_pred = self(x)
 
         # Compute metrics and loss.
         test_loss = self.loss(y_pred, y)
-        self.log('test_loss', test_loss.item(), prog_bar = True)
-        for metric_name, metric in self._metrics:
+        self.log('test_loss', test_loss, prog_bar = True)
+        for metric in self._metrics.values():
             metric.update(y_pred, y)
-
-            self.log('test_' + metric_name, self._to_out(metric.compute()).item(), prog_bar = True)
+        self._metrics_updated = True
 
         return {
             'test_loss': test_loss,
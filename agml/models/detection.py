@@ -45,7 +45,7 @@ except ImportError:
 
 from agml.models.base import AgMLModelBase
 from agml.models.benchmarks import BenchmarkMetadata
-from agml.models.tools import auto_move_data
+from agml.models.tools import auto_move_data, resize_image_batch
 from agml.models.metrics.map import MeanAveragePrecision
 from agml.data.public import source
 from agml.backend.tftorch import is_array_like
@@ -255,11 +255,19 @@ class DetectionModel(AgMLModelBase):
         A 4-dimensional, preprocessed `torch.Tensor`. If `return_shapes`
         is set to True, it also returns the original shapes of the images.
         """
-        images = self._expand_input_images(images)
+        images, is_batched = self._expand_input_images_batched(images)
         shapes = self._get_shapes(images)
-        images = torch.stack(
-            [self._preprocess_image(
-                image, self._image_size) for image in images], dim = 0)
+
+        # A contiguous batch of 8-bit RGB images can be resized, scaled,
+        # and transposed as a whole batch, rather than image-by-image.
+        if is_batched and images.dtype == np.uint8 and images.shape[-1] == 3:
+            (w, h) = self._image_size
+            images = self._fused_preprocess(
+                resize_image_batch(images, (h, w)), (0., 0., 0.), (1., 1., 1.))
+        else:
+            images = torch.stack(
+                [self._preprocess_image(
+                    image, self._image_size) for image in images], dim = 0)
         if return_shapes:
             return images, shapes
         return images
@@ -56,17 +56,31 @@ class Accuracy(nn.Module):
         """
         if not len(pred_data) == len(gt_data):
             raise ValueError("Predictions and truths should be the same length.")
-        if isinstance(pred_data, np.ndarray):
-            pred_data = torch.from_numpy(pred_data)
-        if isinstance(gt_data, np.ndarray):
-            gt_data = torch.from_numpy(gt_data)
-        self._prediction_data.extend(pred_data)
-        self._truth_data.extend(gt_data)
+        # Whole batches are stored (and concatenated in `compute()`), so
+        # that tensors stay on their device and aren't split up per item.
+        self._prediction_data.append(self._as_tensor(pred_data))
+        self._truth_data.append(self._as_tensor(gt_data))
+
+    @staticmethod
+    def _as_tensor(data):
+        """Converts a sequence of labels into a single tensor."""
+        if isinstance(data, torch.Tensor):
+            return data
+        if isinstance(data, np.ndarray):
+            return torch.from_numpy(data)
+        return torch.stack([torch.as_tensor(item) for item in data])
 
     def compute(self):
         """Computes the accuracy between the predictions and ground truths."""
-        return accuracy(torch.stack(self._prediction_data),
-                        torch.stack(self._truth_data))
+        predictions = torch.cat(self._prediction_data)
+        truths = torch.cat(self._truth_data).to(predictions.device)
+
+        # Integer label predictions are compared directly to the truths.
+        if predictions.ndim == 1:
+            if truths.ndim > 1: # one-hot truths
+                truths = torch.argmax(truths, dim = -1)
+            return predictions.eq(truths).float().mean().view(1)
+        return accuracy(predictions, truths)
 
     def reset(self):
         """Resets the accumulator states."""
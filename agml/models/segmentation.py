@@ -28,10 +28,14 @@ except ImportError:
 
 from agml.models.base import AgMLModelBase
 from agml.models.benchmarks import BenchmarkMetadata
-from agml.models.tools import auto_move_data, imagenet_style_process
+from agml.models.tools import (
+    auto_move_data, imagenet_style_process,
+    resize_image_batch, get_classification_metric, get_optimizer,
+    IMAGENET_MEAN, IMAGENET_STD
+)
 from agml.models.losses import DiceLoss
 from agml.data.public import source
-from agml.utils.general import resolve_list_value, has_func
+from agml.utils.general import resolve_list_value
 from agml.utils.image import resolve_image_size
 from agml.utils.logging import log
 from agml.viz.masks import show_image_and_overlaid_mask, show_image_and_mask
@@ -172,11 +176,20 @@ class SegmentationModel(AgMLModelBase):
         A 4-dimensional, preprocessed `torch.Tensor`. If `return_shapes`
         is set to True, it also returns the original shapes of the images.
         """
-        images = self._expand_input_images(images)
+        images, is_batched = self._expand_input_images_batched(images)
         shapes = self._get_shapes(images)
-        images = torch.stack(
-            [self._preprocess_image(
-                image, self._image_size, **kwargs) for image in images], dim = 0)
+
+        # A contiguous batch of 8-bit RGB images can be resized, normalized,
+        # and transposed as a whole batch, rather than image-by-image.
+        if is_batched and images.dtype == np.uint8 and images.shape[-1] == 3 \
+                and kwargs.get('normalize', True):
+            images = self._fused_preprocess(
+                resize_image_batch(images, self._image_size),
+                IMAGENET_MEAN, IMAGENET_STD)
+        else:
+            images = torch.stack(
+                [self._preprocess_image(
+                    image, self._image_size, **kwargs) for image in images], dim = 0)
         if return_shapes:
             return images, shapes
         return images
@@ -474,57 +487,46 @@ class SegmentationModel(AgMLModelBase):
                     f"Expected a callable loss function, but got '{type(loss)}'.")
 
         # Initialize the metrics.
-        metric_collection = []
-        if len(metrics) > 0:
-            for metric in metrics:
-                # Check if it is a valid torchmetrics metric.
-                if isinstance(metric, str):
-                    try:
-                        from torchmetrics import classification as class_metrics
-                    except ImportError:
-                        raise ImportError(
-                            "Received the name of a metric. If you want to use named "
-                            "metrics, then you need to have `torchmetrics` installed. "
-                            "You can do this by running `pip install torchmetrics`.")
-
-                    # Check if `torchmetrics.classification` has the metric.
-                    if has_func(class_metrics, metric):
-                        # iou/miou is a special case
-                        if metric == 'iou' or metric == 'miou':
-                            metric_collection.append(
-                                [metric, IoU(
-                                    task = 'multiclass' if self._num_classes > 1 else 'binary',  # noqa
-                                    num_classes = self._num_classes + 1)])
-
-                        # convert to camel case
-                        else:
-                            metric = ''.join([word.capitalize() for word in metric.split('_')])
-                            metric_collection.append([metric, getattr(class_metrics, metric)()])
-                    else:
-                        raise ValueError(
-                            f"Expected a valid metric torchmetrics metric name, "
-                            f"but got '{metric}'. Check `torchmetrics.classification` "
-                            f"for a list of valid image classification metrics.")
-
-                # Check if it is any other class.
-                elif isinstance(metric, nn.Module):
-                    metric_collection.append(metric)
-
-                # Otherwise, raise an error.
-                else:
-                    raise TypeError(
-                        f"Expected a metric name or a metric class, but got '{type(metric)}'.")
+        metric_collection = {}
+        for metric in metrics:
+            # Check if it is a valid torchmetrics metric.
+            if isinstance(metric, str):
+                # iou/miou is a special case
+                if metric == 'iou' or metric == 'miou':
+                    metric_collection[metric] = IoU(
+                        task = 'multiclass' if self._num_classes > 1 else 'binary',  # noqa
+                        num_classes = self._num_classes + 1)
+                    continue
+
+                # Check if `torchmetrics.classification` has the metric.
+                metric_class = get_classification_metric(metric)
+                if metric_class is None:
+                    raise ValueError(
+                        f"Expected a valid metric torchmetrics metric name, "
+                        f"but got '{metric}'. Check `torchmetrics.classification` "
+                        f"for a list of valid image classification metrics.")
+                metric_collection[metric_class.__name__] = metric_class()
+
+            # Check if it is any other class.
+            elif isinstance(metric, nn.Module):
+                metric_collection[metric.__class__.__name__] = metric
+
+            # Otherwise, raise an error.
+            else:
+                raise TypeError(
+                    f"Expected a metric name or a metric class, but got '{type(metric)}'.")
         self._metrics = metric_collection
 
         # Initialize the optimizer/learning rate scheduler.
         if isinstance(optimizer, str):
-            optimizer_class = optimizer.capitalize()
-            if not has_func(torch.optim, optimizer_class):
+            # Optimizer names are matched case-insensitively (e.g., `sgd`).
+            optimizer_class = get_optimizer(optimizer)
+            if optimizer_class is None:
                 raise ValueError(
-                    f"Expected a valid optimizer name, but got '{optimizer_class}'. "
+                    f"Expected a valid optimizer name, but got '{optimizer}'. "
                     f"Check `torch.optim` for a list of valid optimizers.")
 
-            optimizer = getattr(torch.optim, optimizer_class)(
+            optimizer = optimizer_class(
                 self.parameters(), lr = kwargs.get('lr', 2e-3))
         elif isinstance(optimizer, torch.optim.Optimizer):
             pass  # nothing to do
@@ -562,9 +564,10 @@ class SegmentationModel(AgMLModelBase):
 
         # Compute metrics and loss.
         loss = self.loss(y_pred, y)
-        for metric_name, metric in self._metrics:
+        self.log('loss', loss, prog_bar = True, on_step = True, on_epoch = True)
+        for metric in self._metrics.values():
             metric.update(y_pred, y)
-            self.log(metric_name, self._to_out(metric.compute()).item(), prog_bar = True)
+        self._metrics_updated = True
 
         return {
             'loss': loss,
@@ -577,11 +580,10 @@ class SegmentationModel(AgMLModelBase):
 
         # Compute metrics and loss.
         val_loss = self.loss(y_pred, y)
-        self.log('val_loss', val_loss.item(), prog_bar = True)
-        for metric_name, metric in self._metrics:
-            metric.to(self.device)
+        self.log('val_loss', val_loss, prog_bar = True)
+        for metric in self._metrics.values():
             metric.update(y_pred, y)
-            self.log('val_' + metric_name, self._to_out(metric.compute()).item(), prog_bar = True)
+        self._metrics_updated = True
 
         return {
             'val_loss': val_loss,
@@ -594,11 +596,10 @@ class SegmentationModel(AgMLModelBase):
 
         # Compute metrics and loss.
         test_loss = self.loss(y_pred, y)
-        self.log('test_loss', test_loss.item(), prog_bar = True)
-        for metric_name, metric in self._metrics:
+        self.log('test_loss', test_loss, prog_bar = True)
+        for metric in self._metrics.values():
             metric.update(y_pred, y)
-
-            self.log('test_' + metric_name, self._to_out(metric.compute()).item(), prog_bar = True)
+        self._metrics_updated = True
 
         return {
             'test_loss': test_loss,
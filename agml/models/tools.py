@@ -12,9 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import importlib.util
 from typing import Callable
-from functools import wraps
+from functools import wraps, lru_cache
 
+import cv2
 import torch
 import numpy as np
 import albumentations as A
@@ -22,6 +24,11 @@ import albumentations as A
 from agml.backend.tftorch import is_array_like
 
 
+# ImageNet normalization parameters, in the range [0, 1].
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
 def imagenet_style_process(image, size = None, **kwargs):
     """Preprocesses a single input image to ImageNet standards.
 
@@ -63,8 +70,7 @@ def imagenet_style_process(image, size = None, **kwargs):
     # Normalize the image to ImageNet standards.
     if kwargs.get('normalize', True):
         if 1 <= image.max() <= 255:
-            mean = [0.485, 0.456, 0.406]
-            std = [0.229, 0.224, 0.225]
+            mean, std = IMAGENET_MEAN, IMAGENET_STD
             image = image.astype(np.float32) / 255.
             mean = np.array(mean, dtype = np.float32)
             std = np.array(std, dtype = np.float32)
@@ -81,6 +87,134 @@ def imagenet_style_process(image, size = None, **kwargs):
     return image
 
 
+def resize_image_batch(images, size = None):
+    """Resizes a channels-last batch of images into a new contiguous batch.
+
+    The resized images are written directly into a preallocated output
+    batch. This uses the same (bilinear) interpolation as the resize in
+    `imagenet_style_process`. If the images are already the right size,
+    then the input batch is returned as-is. The images can also be a list
+    of differently-sized images, which are then all resized into one batch.
+    """
+    h = w = 224
+    if size is not None:
+        h, w = size
+    first = images[0]
+    if isinstance(images, np.ndarray) and images.shape[1:3] == (h, w):
+        return images
+    out = np.empty((len(images), h, w, *first.shape[2:]), dtype = first.dtype)
+    for image, dst in zip(images, out):
+        if image.shape[:2] == (h, w):
+            dst[...] = image
+        else:
+            cv2.resize(image, (w, h), dst = dst, interpolation = cv2.INTER_LINEAR)
+    return out
+
+
+@lru_cache(maxsize = None)
+def _compile_fused_preprocess():
+    """Compiles the fused preprocessing kernel, if Numba is installed."""
+    try:
+        import numba
+    except ImportError:
+        return None
+
+    @numba.njit(parallel = True, fastmath = True, cache = True)
+    def _fused_preprocess_kernel(images, mean, inv_std, out):
+        n, h, w, c = images.shape
+        for i in numba.prange(n): # noqa
+            for y in range(h):
+                for x in range(w):
+                    for k in range(c):
+                        out[i, k, y, x] = (images[i, y, x, k] - mean[k]) * inv_std[k]
+
+    return _fused_preprocess_kernel
+
+
+def fused_preprocess(images, mean, inv_std, out = None):
+    """Normalizes and transposes a batch of images in a single pass.
+
+    This takes a channels-last batch of images with shape [N, H, W, C] and
+    writes `(image - mean) * inv_std` into a channels-first float32 array
+    of shape [N, C, H, W], which can be wrapped by `torch.from_numpy()`
+    without any further copies. If Numba is installed, this is done with
+    a single parallel, fused loop over the images, rather than one pass
+    each for the type cast, normalization, and transposition; otherwise,
+    it falls back to the equivalent NumPy operations.
+
+    Note that `mean` and `inv_std` should be in the same value range as
+    the `images`, e.g., for `uint8` images in the range [0, 255], they
+    should be scaled accordingly (see `AgMLModelBase._fused_preprocess`).
+    """
+    mean = np.asarray(mean, dtype = np.float32)
+    inv_std = np.asarray(inv_std, dtype = np.float32)
+    if out is None:
+        n, h, w, c = images.shape
+        out = np.empty((n, c, h, w), dtype = np.float32)
+
+    kernel = _compile_fused_preprocess()
+    if kernel is not None:
+        kernel(images, mean, inv_std, out)
+    else:
+        np.multiply(np.subtract(
+            images, mean, dtype = np.float32), inv_std,
+            out = out.transpose(0, 2, 3, 1))
+    return out
+
+
+@lru_cache(maxsize = None)
+def _classification_metric_registry():
+    """Maps the lowercase names of `torchmetrics.classification` metrics to them."""
+    try:
+        from torchmetrics import Metric
+        from torchmetrics import classification as class_metrics
+    except ImportError:
+        raise ImportError(
+            "Received the name of a metric. If you want to use named "
+            "metrics, then you need to have `torchmetrics` installed. "
+            "You can do this by running `pip install torchmetrics`.")
+    return {name.lower(): value for name, value in vars(class_metrics).items()
+            if isinstance(value, type) and issubclass(value, Metric)}
+
+
+def get_classification_metric(name):
+    """Returns the `torchmetrics.classification` metric class with a name.
+
+    The name can be given in either snake case or camel case (for instance,
+    `f1_score` or `F1Score`). If there is no such metric, returns `None`.
+    """
+    return _classification_metric_registry().get(
+        name.replace('_', '').lower(), None)
+
+
+@lru_cache(maxsize = None)
+def _optimizer_registry():
+    """Maps the lowercase names of the `torch.optim` optimizers to them."""
+    return {name.lower(): value for name, value in vars(torch.optim).items()
+            if isinstance(value, type) and issubclass(value, torch.optim.Optimizer)
+            and value is not torch.optim.Optimizer}
+
+
+def get_optimizer(name):
+    """Returns the `torch.optim` optimizer class with a name.
+
+    The name is matched case-insensitively (for instance, `sgd` or `AdamW`).
+    If there is no such optimizer, returns `None`.
+    """
+    return _optimizer_registry().get(name.lower(), None)
+
+
+@lru_cache(maxsize = None)
+def torch_compile_available():
+    """Returns whether networks can be compiled with `torch.compile` on a GPU.
+
+    This requires a CUDA device, a PyTorch version which has `Module.compile`,
+    and Triton (which the default compiler backend uses for GPU kernels).
+    """
+    return torch.cuda.is_available() and hasattr(torch.nn.Module, 'compile') \
+        and importlib.util.find_spec('triton') is not None
+
+
 # Ported from PyTorch Lightning v1.3.0.
 def auto_move_data(fn: Callable) -> Callable:
     """
@@ -0,0 +1,92 @@
+# Copyright 2021 UC Davis Plant AI and Biophysics Lab
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import torch
+
+
+def _to_device(batch, device):
+    """Copies all of the tensors in a (nested) batch to the device."""
+    if isinstance(batch, torch.Tensor):
+        return batch.to(device, non_blocking = True)
+    if isinstance(batch, (list, tuple)):
+        return type(batch)(_to_device(item, device) for item in batch)
+    if isinstance(batch, dict):
+        return {key: _to_device(value, device) for key, value in batch.items()}
+    return batch
+
+
+def _record_stream(batch, stream):
+    """Marks all of the tensors in a (nested) batch as used by the stream."""
+    if isinstance(batch, torch.Tensor):
+        batch.record_stream(stream)
+    elif isinstance(batch, (list, tuple)):
+        for item in batch:
+            _record_stream(item, stream)
+    elif isinstance(batch, dict):
+        for value in batch.values():
+            _record_stream(value, stream)
+
+
+class CUDAPrefetcher(object):
+    """Wraps a data loader to copy batches to a GPU ahead of time.
+
+    While the current batch is being used for training, the next batch
+    is already copied to the GPU on a separate CUDA stream, so that the
+    host-to-device copy is overlapped with computation rather than the
+    training step waiting for it (as in the Apex ImageNet example). This
+    needs the data loader to use pinned memory for the copies to be
+    asynchronous. The batches which are yielded are already on the GPU.
+
+    Parameters
+    ----------
+    loader : Iterable
+        The data loader to wrap, usually a `torch.utils.data.DataLoader`.
+    device : {int, str, torch.device}
+        The CUDA device to copy the batches to. Defaults to the current one.
+    """
+
+    def __init__(self, loader, device = None):
+        self.loader = loader
+        if isinstance(device, int):
+            device = f'cuda:{device}'
+        self.device = torch.device('cuda' if device is None else device)
+
+    def __len__(self):
+        return len(self.loader)
+
+    def __iter__(self):
+        stream = torch.cuda.Stream(self.device)
+        batches = iter(self.loader)
+        next_batch = self._preload(batches, stream)
+        while next_batch is not None:
+            # Wait for the copy of the batch to finish before using it, and
+            # mark its memory as in use by the current stream, so that the
+            # caching allocator doesn't reuse it while it is still needed.
+            current_stream = torch.cuda.current_stream(self.device)
+            current_stream.wait_stream(stream)
+            batch = next_batch[0]
+            _record_stream(batch, current_stream)
+
+            # Start copying the following batch before yielding this one.
+            next_batch = self._preload(batches, stream)
+            yield batch
+
+    def _preload(self, batches, stream):
+        """Starts copying the next batch to the device on the given stream."""
+        try:
+            batch = next(batches)
+        except StopIteration:
+            return None
+        with torch.cuda.stream(stream):
+            return (_to_device(batch, self.device), )
@@ -28,6 +28,7 @@ from agml.models.classification import ClassificationModel
 from agml.models.segmentation import SegmentationModel
 from agml.models.detection import DetectionModel
 from agml.models.system_utils import get_accelerator
+from agml.models.training._prefetcher import CUDAPrefetcher
 from agml.utils.logging import log
 
 
@@ -126,6 +127,12 @@ def train_classification(model,
         num_workers : int
             The number of workers to use for the dataloaders. If none is provided,
             then the number of workers is set to half of the available CPU cores.
+        prefetch_factor : int
+            The number of batches each dataloader worker prefetches (4 by default).
+        precision : str
+            The precision to train with, passed to the Lightning `Trainer`. If none
+            is provided, then mixed precision is used on a GPU (`bf16-mixed` if the
+            GPU supports it, otherwise `16-mixed`), and full precision on a CPU.
 
     Returns
     -------
@@ -151,23 +158,33 @@ def train_classification(model,
             nw = os.cpu_count() // 2
         if not any([dataset.train_data, dataset.val_data, dataset.test_data]):
             raise ValueError("The provided dataset must have split data.")
+
+        # Keep the workers alive between epochs and let them prefetch
+        # batches, and use pinned memory for faster copies to a GPU.
+        loader_kwargs = {'num_workers': nw}
+        if nw > 0:
+            loader_kwargs['persistent_workers'] = True
+            loader_kwargs['prefetch_factor'] = kwargs.get('prefetch_factor', 4)
+        if torch.cuda.is_available() and not use_cpu:
+            loader_kwargs['pin_memory'] = True
+
         if dataset.train_data is not None:
             train_dataloader = dataset.train_data.export_torch(
                 batch_size = batch_size,
                 shuffle = True,
-                num_workers = nw
+                **loader_kwargs
             )
         if dataset.val_data is not None:
             val_dataloader = dataset.val_data.export_torch(
                 batch_size = batch_size,
                 shuffle = False,
-                num_workers = nw
+                **loader_kwargs
             )
         if dataset.test_data is not None:
             test_dataloader = dataset.test_data.export_torch(
                 batch_size = batch_size,
                 shuffle = False,
-                num_workers = nw
+                **loader_kwargs
             )
         dataset_name = dataset.info.name
 
@@ -239,10 +256,36 @@ def train_classification(model,
     else:
         devices = 'auto'
 
+    # When training on a single GPU, the next batch is copied to the GPU
+    # while the current batch is training (with multiple GPUs, Lightning
+    # needs the original loaders to set up distributed sampling).
+    if accelerator in ('cuda', 'gpu'):
+        if isinstance(devices, (list, tuple)):
+            device = devices[0] if len(devices) == 1 else None
+        else:
+            device = 0 if torch.cuda.device_count() == 1 else None
+        if device is not None:
+            if train_dataloader is not None:
+                train_dataloader = CUDAPrefetcher(train_dataloader, device)
+            if val_dataloader is not None:
+                val_dataloader = CUDAPrefetcher(val_dataloader, device)
+
+    # Use mixed precision on a GPU, which lets the convolutions use Tensor
+    # Cores, and TF32 for any remaining full-precision matrix multiplications.
+    precision = kwargs.get('precision', None)
+    if precision is None:
+        if accelerator in ('cuda', 'gpu'):
+            precision = 'bf16-mixed' if torch.cuda.is_bf16_supported() else '16-mixed'
+        else:
+            precision = '32-true'
+    if accelerator in ('cuda', 'gpu'):
+        torch.set_float32_matmul_precision('high')
+
     trainer = Trainer(
         max_epochs = epochs,
         accelerator = accelerator,
         devices = devices,
+        precision = precision,
         logger = loggers,
         callbacks = [checkpoint_callback],
         log_every_n_steps = 2,
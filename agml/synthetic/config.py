@@ -22,7 +22,7 @@ import functools
 import subprocess as sp
 from datetime import datetime as dt
 
-from agml.utils.io import recursive_dirname
+from agml.utils.io import recursive_dirname, load_json
 
 
 # If this file is imported multiple times, only run the check once.
@@ -40,11 +40,10 @@ LIDAR_SOURCE = os.path.join(HELIOS_PATH, 'plugins/lidar/src/LiDAR.cpp')
 HELIOS_CONFIG_FILE = os.path.expanduser('~/.agml/helios_config.json')
 
 
-@functools.lru_cache(maxsize = None)
+@functools.lru_cache(maxsize = 1)
 def load_default_helios_configuration():
     """Loads the default Helios parameter configuration."""
-    with open(HELIOS_CONFIG_FILE, 'r') as f:
-        return json.load(f)
+    return load_json(HELIOS_CONFIG_FILE)
 
 
 def reinstall_helios(force = False):
@@ -181,6 +180,9 @@ def _update_helios_parameters():
     with open(HELIOS_CONFIG_FILE, 'w') as f:
         json.dump(params, f, indent = 4)
 
+    # The configuration is cached once it is loaded, so clear the cache.
+    load_default_helios_configuration.cache_clear()
+
 
 def _get_canopy_params():
     """Updates the default canopy generation parameters for Helios."""
@@ -221,7 +223,6 @@ def _get_canopy_params():
             # Ignore the methods which define the parameters from an XML file,
             # we only want the ones that read the default parameter values.
             if 'readParametersFromXML' in source:
-                print('xml', name, source)
                 continue
 
             definitions = [
@@ -13,9 +13,10 @@
 # limitations under the License.
 
 import os
+import copy
 from enum import Enum
 from numbers import Number
-from dataclasses import dataclass, fields, asdict
+from dataclasses import dataclass, fields
 from typing import List, Union, Sequence, TypeVar, Any
 
 from agml.framework import AgMLSerializable
@@ -41,56 +42,145 @@ class SimulationType(Enum):
 NumberOrMaybeList = TypeVar('NumberOrMaybeList', Number, List[Number])
 
 
+# Whether values set on the parameters have their types checked. This
+# is skipped when running with `python -O`, or `AGML_SKIP_TYPECHECK=1`.
+_CHECK_PARAMETER_TYPES = __debug__ and not os.environ.get('AGML_SKIP_TYPECHECK')
+
+
+def _annotation_types(annotation):
+    """Returns the type(s) which values of an annotated attribute must have.
+
+    The annotations are `typing` constructs (e.g., `List[Number]`), which
+    can't be used with `isinstance`, so they are mapped to the equivalent
+    concrete types. These are computed once, when the class is created.
+    """
+    if annotation is Any:
+        return None
+    if isinstance(annotation, TypeVar): # e.g., `NumberOrMaybeList`
+        return tuple(t for constraint in annotation.__constraints__
+                     for t in _as_tuple(_annotation_types(constraint)))
+    try: # subscripted generics, e.g., `List[Number]` -> `list`
+        return annotation.__origin__
+    except AttributeError:
+        if annotation is str:
+            return str
+        if annotation is os.PathLike:
+            return str, os.PathLike
+        return int, float
+
+
+def _as_tuple(types):
+    return types if isinstance(types, tuple) else (types, )
+
+
+def _slotted(cls):
+    """Recreates a parameter dataclass with `__slots__` for its fields.
+
+    This is equivalent to `dataclass(slots = True)`, which is only available
+    from Python 3.10 onwards. The instances don't have a `__dict__`, which
+    reduces their memory usage and speeds up attribute access.
+    """
+    cls_dict = dict(cls.__dict__)
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict['__slots__'] = tuple(
+        name for name in field_names if name in cls.__dict__['__annotations__'])
+    for name in field_names: # the defaults can't be class attributes
+        cls_dict.pop(name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
 @dataclass(repr = False)
 class Parameters:
-    """Base class for parameters, to enable runtime type checks."""
+    """Base class for parameters, to enable runtime type checks.
+
+    The type checks can be disabled (e.g., for large generation sweeps
+    whose values are known to be valid) by running Python with the `-O`
+    flag, or by setting the environment variable `AGML_SKIP_TYPECHECK=1`.
+    """
+    __slots__ = ('_defined_fields', )
+
+    # The type(s) which each of the attributes is checked against.
+    _field_types = {}
+
+    def __init_subclass__(cls, **kwargs):
+        # The types are resolved from the annotations when the class is
+        # created, rather than every single time an attribute is set.
+        super().__init_subclass__(**kwargs)
+        cls._field_types = {
+            **cls._field_types, **{
+                key: _annotation_types(annotation) for key, annotation
+                in cls.__dict__.get('__annotations__', {}).items()}}
 
     def __post_init__(self):
-        # Remove all parameters which don't belong to this class. We know
-        # they don't belong if they are still `None` after initialization.
-        self_dict = self.__dict__.copy()
-        for attr in self_dict:
-            if self.__dict__[attr] is None:
-                delattr(self, attr)
-        self._block_new_attributes = True
+        # Record the parameters which belong to this class. We know they
+        # don't belong if they are still `None` after initialization (they
+        # are kept as `None`). Once these are set, nothing else can be set.
+        self._defined_fields = frozenset(
+            name for name in self._field_types
+            if getattr(self, name) is not None)
+
+    def __getstate__(self):
+        state = {name: getattr(self, name) for name in self._defined_fields}
+        state['_defined_fields'] = self._defined_fields
+        return state
+
+    def __setstate__(self, state):
+        # Parameters which were pickled before `__slots__` were used
+        # have their `__dict__` as the state, without the defined fields.
+        if '_defined_fields' not in state:
+            state = {k: v for k, v in state.items()
+                     if k in self._field_types and v is not None}
+            state['_defined_fields'] = frozenset(state)
+        for name in self._field_types: # the unused parameters are `None`
+            object.__setattr__(self, name, None)
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
+
+    def __deepcopy__(self, memo):
+        # Only the lists need to be copied, the other values are immutable.
+        parameters = object.__new__(self.__class__)
+        parameters.__setstate__({
+            key: copy.deepcopy(value, memo) if isinstance(value, list) else value
+            for key, value in self.__getstate__().items()})
+        return parameters
 
     def __repr__(self):
         # This is custom-defined to exclude optional unused attributes.
         defined_values = (
             (f.name, getattr(self, f.name))
             for f in fields(self)
-            if getattr(self, f.name) != f.default)
+            if f.name in self._defined_fields)
         value_repr = ", ".join(f"{name}={value}" for name, value in defined_values)
         return f"{self.__class__.__qualname__}({value_repr})"
 
     def __setattr__(self, key, value):
-        # Don't allow the assignment of new attributes.
-        if key not in self.__dict__.keys():
-            if not hasattr(self, '_block_new_attributes'):
-                super().__setattr__(key, value)
-                return
+        # Don't allow the assignment of new attributes, including the
+        # attributes which don't belong to this class (which are `None`).
+        try:
+            defined_fields = self._defined_fields
+        except AttributeError: # still being initialized
+            super().__setattr__(key, value)
+            return
+        if key not in defined_fields:
             raise AttributeError(f"Cannot assign new attributes '{key}' "
                                  f"to class {self.__class__.__name__}.")
 
         # Check if the type of the value matches that of the key.
-        annotation = self.__annotations__[key]
-        if annotation is not Any:
-            try:
-                annotation = annotation.__origin__
-            except AttributeError:
-                if annotation is str:
-                    pass
-                else:
-                    # enables type checks for subscripted generics
-                    annotation = (int, float)
-            if not isinstance(value, annotation):
-                raise TypeError(
-                    f"Expected a value of type ({annotation}) for attribute "
-                    f"'{key}', instead got '{value}' of type ({type(value)}).")
+        if not _CHECK_PARAMETER_TYPES:
+            super().__setattr__(key, value)
+            return
+        annotation = self._field_types[key]
+        if annotation is not None and not isinstance(value, annotation):
+            raise TypeError(
+                f"Expected a value of type ({annotation}) for attribute "
+                f"'{key}', instead got '{value}' of type ({type(value)}).")
 
         super().__setattr__(key, value)
 
 
+@_slotted
 @dataclass(repr = False)
 class CanopyParameters(Parameters):
     """Stores canopy-specific parameters for Helios.
@@ -226,6 +316,7 @@ class CanopyParameters(Parameters):
     s5_leaf_texture_file: str             = None
 
 
+@_slotted
 @dataclass(repr = False)
 class CameraParameters(Parameters):
     """Stores camera parameters for Helios."""
@@ -249,6 +340,7 @@ class CameraParameters(Parameters):
             aerial_parameters = aerial_parameters)
 
 
+@_slotted
 @dataclass(repr = False)
 class LiDARParameters(Parameters):
     """Stores LiDAR parameters for Helios."""
@@ -263,6 +355,31 @@ class LiDARParameters(Parameters):
     ASCII_format: str           = None
 
 
+# The default parameters for each canopy, constructed once per loaded
+# Helios configuration, and then copied for each `HeliosOptions`.
+_DEFAULT_PARAMETERS = {}
+
+
+def _default_parameters(config, canopy):
+    """Returns the default canopy, camera, and LiDAR parameters for a canopy.
+
+    The canopy is only validated against the canopy types when its default
+    parameters are first constructed; afterwards, it is simply looked up.
+    """
+    config_and_parameters = _DEFAULT_PARAMETERS.get(canopy, None)
+    if config_and_parameters is None or config_and_parameters[0] is not config:
+        if canopy not in config['canopy']['types']:
+            raise ValueError(
+                f"Received invalid canopy type '{canopy}', expected "
+                f"one of: {sorted(config['canopy']['types'])}.")
+        parameters = (
+            CanopyParameters(**config['canopy']['parameters'][canopy]),
+            CameraParameters(**config['camera']['parameters']),
+            LiDARParameters(**config['lidar']['parameters']))
+        config_and_parameters = _DEFAULT_PARAMETERS[canopy] = (config, parameters)
+    return config_and_parameters[1]
+
+
 class HeliosOptions(AgMLSerializable):
     """Stores a set of parameter options for a `HeliosDataGenerator`.
 
@@ -311,19 +428,14 @@ class HeliosOptions(AgMLSerializable):
 
     def _initialize_canopy(self, canopy):
         """Initializes Helios options from the provided canopy."""
-        if canopy not in self._default_config['canopy']['types']:
-            raise ValueError(
-                f"Received invalid canopy type '{canopy}', expected "
-                f"one of: {self._default_config['canopy']['types']}.")
+        # Get the parameters corresponding to the canopy type (which also
+        # checks that the canopy is valid). These are copies of the cached
+        # defaults, so that editing them (including any of the lists in
+        # them) doesn't modify the defaults themselves.
+        parameters = _default_parameters(self._default_config, canopy)
         self._canopy = canopy
-
-        # Get the parameters and ranges corresponding to the canopy type.
-        self._canopy_parameters = \
-            CanopyParameters(**self._default_config['canopy']['parameters'][canopy])
-        self._camera_parameters = \
-            CameraParameters(**self._default_config['camera']['parameters'])
-        self._lidar_parameters = \
-            LiDARParameters(**self._default_config['lidar']['parameters'])
+        self._canopy_parameters, self._camera_parameters, \
+            self._lidar_parameters = copy.deepcopy(parameters)
 
     @property
     def canopy(self) -> CanopyParameters:
@@ -386,7 +498,9 @@ class HeliosOptions(AgMLSerializable):
 
     @staticmethod
     def _asdict(obj):
-        return {k: v for k, v in asdict(obj).items() if v is not None}
+        # The unused attributes (which are `None`) are left out.
+        return {f.name: copy.deepcopy(getattr(obj, f.name)) for f in fields(obj)
+                if f.name in obj._defined_fields}
 
     def _to_dict(self):
         """Returns the options in dictionary format."""
@@ -20,7 +20,6 @@ import math
 from typing import List, Union, Tuple
 
 import numpy as np
-from scipy.signal import sawtooth
 
 from agml.utils.io import get_dir_list
 
@@ -151,6 +150,7 @@ def generate_camera_positions(
 
     elif camera_type == 'aerial':
         if aerial_parameters.get('distribution', '') == 'sawtooth':
+            from scipy.signal import sawtooth
             angled = aerial_parameters.get('angled', False)
             t = camera_spacing * np.linspace(0, 1, num_views)
             triangle = camera_spacing * sawtooth(1 * np.pi * 5 * t, 0.5)
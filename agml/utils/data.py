@@ -14,46 +14,43 @@
 
 import os
 import sys
-import json
 import shutil
 import difflib
 import functools
 
+from agml.utils.io import load_json
+
 
 @functools.lru_cache(maxsize = None)
 def load_public_sources() -> dict:
     """Loads the public data sources JSON file."""
-    with open(os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            '_assets/public_datasources.json')) as f:
-        return json.load(f)
+    return load_json(os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        '_assets/public_datasources.json'))
 
 
 @functools.lru_cache(maxsize = None)
 def load_citation_sources() -> dict:
     """Loads the citation sources JSON file."""
-    with open(os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            '_assets/source_citations.json')) as f:
-        return json.load(f)
+    return load_json(os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        '_assets/source_citations.json'))
 
 
 @functools.lru_cache(maxsize = None)
 def load_model_benchmarks() -> dict:
     """Loads the citation sources JSON file."""
-    with open(os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            '_assets/model_benchmarks.json')) as f:
-        return json.load(f)
+    return load_json(os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        '_assets/model_benchmarks.json'))
 
 
 @functools.lru_cache(maxsize = None)
 def load_detector_benchmarks() -> dict:
     """Loads the citation sources JSON file."""
-    with open(os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            '_assets/detector_benchmarks.json')) as f:
-        return json.load(f)
+    return load_json(os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        '_assets/detector_benchmarks.json'))
 
 
 def maybe_you_meant(name, msg, source = None) -> str:
@@ -15,6 +15,7 @@
 import os
 import shutil
 import zipfile
+import tempfile
 
 from agml.utils.data import (
     load_public_sources, maybe_you_meant, copyright_print
@@ -22,6 +23,10 @@ from agml.utils.data import (
 from agml.utils.logging import tqdm, log
 
 
+# Downloaded zip files up to this size are kept in memory for extraction.
+_SPOOLED_ZIP_MAX_SIZE = 512 * 1024 * 1024
+
+
 def download_dataset(dataset_name, dest_dir, redownload = False):
     """
     Downloads a dataset from the agdata-data s3 file storage.
@@ -69,42 +74,43 @@ def download_dataset(dataset_name, dest_dir, redownload = False):
     dataset_download_path = os.path.join(
         dest_dir, dataset_name + '.zip')
 
-    # Download object from bucket
-    try:
-        with requests.Session() as sess:
-            r = sess.get(url, stream = True)
-            r.raise_for_status()
-            content_size = int(r.headers['Content-Length'])
-            sz = round(content_size / 1000000, 1)
-            size_print = f"{sz} MB"
-            if sz > 1000:
-                size_print = f"{round(sz / 1000, 2)} GB"
-            pg = tqdm(total = content_size,
-                      desc = f"Downloading {dataset_name} "
-                             f"(size = {size_print})")
-            with open(dataset_download_path, 'wb') as f:
+    # Download object from bucket. The zip file is buffered in memory
+    # (unless it is very large), rather than written to disk and then
+    # read back again in order to extract it.
+    with tempfile.SpooledTemporaryFile(max_size = _SPOOLED_ZIP_MAX_SIZE) as data:
+        try:
+            with requests.Session() as sess:
+                r = sess.get(url, stream = True)
+                r.raise_for_status()
+                content_size = int(r.headers['Content-Length'])
+                sz = round(content_size / 1000000, 1)
+                size_print = f"{sz} MB"
+                if sz > 1000:
+                    size_print = f"{round(sz / 1000, 2)} GB"
+                pg = tqdm(total = content_size,
+                          desc = f"Downloading {dataset_name} "
+                                 f"(size = {size_print})")
                 for chunk in r.iter_content(chunk_size = 8192):
-                    f.write(chunk)
+                    data.write(chunk)
                     pg.update(8192)
-            pg.close()
-    except BaseException as e:
-        try:
-            pg.close()
-        except (NameError, UnboundLocalError):
-            pass
-        if os.path.exists(dataset_download_path):
-            os.remove(dataset_download_path)
-        raise e
+                pg.close()
+        except BaseException as e:
+            try:
+                pg.close()
+            except (NameError, UnboundLocalError):
+                pass
+            raise e
 
-    # Unzip downloaded dataset
-    with zipfile.ZipFile(dataset_download_path, 'r') as z:
-        print(f'[AgML Download]: Extracting files for {dataset_name}... ', end = '')
-        z.extractall(path = dest_dir)
-        print('Done!')
+        # Unzip downloaded dataset
+        data.seek(0)
 
-    # Delete zipped file
-    if os.path.exists(dataset_download_path):
-        os.remove(dataset_download_path)
+        # `SpooledTemporaryFile` only implements the whole file interface
+        # (which `zipfile` needs) from Python 3.11, so the underlying file
+        # is read instead (a `BytesIO`, or a temporary file on disk).
+        with zipfile.ZipFile(data._file, 'r') as z:
+            print(f'[AgML Download]: Extracting files for {dataset_name}... ', end = '')
+            z.extractall(path = dest_dir)
+            print('Done!')
 
     # Print dataset copyright info
     copyright_print(dataset_name, os.path.splitext(dataset_download_path)[0])
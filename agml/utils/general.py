@@ -13,14 +13,6 @@
 # limitations under the License.
 
 import re
-import cv2
-import glob
-import math
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-
-from math import pi, floor
-from scipy import signal
 
 import numpy as np
 
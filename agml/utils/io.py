@@ -13,6 +13,12 @@
 # limitations under the License.
 
 import os
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 # Files which shouldn't be included in a file list.
@@ -83,6 +89,15 @@ def create_dir(dir_):
     os.makedirs(dir_, exist_ok = True)
 
 
+def load_json(path):
+    """Loads a JSON file (using `orjson`, which is faster, if it is installed)."""
+    if orjson is None:
+        with open(path, 'r') as f:
+            return json.load(f)
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
 def recursive_dirname(dir_, level = 1):
     """Returns a recursive dirname for the number of levels provided."""
     if level == 0:
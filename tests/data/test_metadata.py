@@ -0,0 +1,87 @@
+# Copyright 2021 UC Davis Plant AI and Biophysics Lab
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+from agml.data.metadata import DatasetMetadata, CustomDatasetMetadata
+
+
+def test_class_mappings():
+    info = DatasetMetadata('bean_disease_uganda')
+    assert info.classes == ['angular_leaf_spot', 'bean_rust', 'healthy']
+    assert info.num_to_class == {
+        0: 'angular_leaf_spot', 1: 'bean_rust', 2: 'healthy'}
+    assert info.class_to_num == {
+        'angular_leaf_spot': 0, 'bean_rust': 1, 'healthy': 2}
+    assert info.num_classes == 3
+
+
+def test_nested_class_mappings():
+    info = DatasetMetadata('autonomous_greenhouse_regression')
+    assert info.num_to_class['classification'] == {
+        0: 'Aphylion', 1: 'Lugano', 2: 'Salanova', 3: 'Satine'}
+    assert info.class_to_num['classification'] == {
+        'Aphylion': 0, 'Lugano': 1, 'Salanova': 2, 'Satine': 3}
+    assert info.num_to_class['regression'][4] == 'LeafArea'
+    assert info.class_to_num['regression']['Height'] == 2
+    assert info.classes['regression'] == [
+        'FreshWeightShoot', 'DryWeightShoot', 'Height', 'Diameter', 'LeafArea']
+
+
+def test_custom_class_mappings():
+    info = CustomDatasetMetadata(
+        'custom', {'task': 'image_classification', 'classes': ['a', 'b']})
+    assert info.num_to_class == {1: 'a', 2: 'b'}
+    assert info.class_to_num == {'a': 1, 'b': 2}
+    assert info.classes == ['a', 'b'] and info.num_classes == 2
+
+
+def test_class_mappings_copy_and_pickle():
+    info = DatasetMetadata('autonomous_greenhouse_regression')
+    for other in (copy.deepcopy(info), pickle.loads(pickle.dumps(info))):
+        assert other.num_to_class == info.num_to_class
+        assert other.class_to_num == info.class_to_num
+        assert other.classes == info.classes
+
+
+def test_image_stats():
+    info = DatasetMetadata('bean_disease_uganda')
+    stats = info.image_stats
+    assert isinstance(stats.mean, list) and isinstance(stats.std, list)
+    assert info.mean_f32.dtype == np.float32
+    np.testing.assert_allclose(info.mean_f32, stats.mean, rtol = 1e-6)
+    np.testing.assert_allclose(
+        info.inv_std_f32, 1. / np.asarray(stats.std), rtol = 1e-6)
+
+
+def test_image_stats_copy_and_pickle():
+    info = DatasetMetadata('bean_disease_uganda')
+    assert 'mean_f32' not in info.__getstate__()
+    for other in (copy.deepcopy(info), pickle.loads(pickle.dumps(info))):
+        assert other.image_stats == info.image_stats
+        np.testing.assert_array_equal(other.mean_f32, info.mean_f32)
+        np.testing.assert_array_equal(other.inv_std_f32, info.inv_std_f32)
+
+
+def test_missing_image_stats():
+    info = CustomDatasetMetadata(
+        'custom', {'task': 'image_classification', 'classes': ['a', 'b']})
+    with pytest.raises(KeyError):
+        info.mean_f32 # noqa
+    with pytest.raises(KeyError):
+        info.inv_std_f32 # noqa
@@ -12,13 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 import os
 import time
 import shutil
+import zipfile
 import pytest
 
 import agml.data as agdata
 from agml.utils.data import load_public_sources
+import agml.utils.downloads as downloads
 
 
 def test_location_filters():
@@ -42,3 +45,46 @@ def test_source_download():
     assert os.path.exists(os.path.join(local_path, 'bean_disease_uganda'))
     assert not os.path.exists(os.path.join(local_path, 'bean_disease_uganda.zip'))
     shutil.rmtree(os.path.join(local_path))
+
+
+class _FakeResponse(object):
+    def __init__(self, content):
+        self.content = content
+        self.headers = {'Content-Length': str(len(content))}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i: i + chunk_size]
+
+
+class _FakeSession(object):
+    content = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def get(self, url, stream = False):
+        return _FakeResponse(self.content)
+
+
+@pytest.mark.parametrize('max_size', [1024 * 1024, 1])
+def test_source_download_extraction(tmp_path, monkeypatch, max_size):
+    # The downloaded zip is spooled (in memory, or on disk once
+    # it exceeds the maximum size) and then extracted from there.
+    import requests
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('bean_disease_uganda/images/a.txt', 'bean' * 5000)
+    monkeypatch.setattr(_FakeSession, 'content', buffer.getvalue())
+    monkeypatch.setattr(requests, 'Session', _FakeSession)
+    monkeypatch.setattr(downloads, '_SPOOLED_ZIP_MAX_SIZE', max_size)
+    downloads.download_dataset('bean_disease_uganda', str(tmp_path))
+    with open(tmp_path / 'bean_disease_uganda' / 'images' / 'a.txt') as f:
+        assert f.read() == 'bean' * 5000
+    assert not os.path.exists(tmp_path / 'bean_disease_uganda.zip')
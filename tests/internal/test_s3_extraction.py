@@ -0,0 +1,78 @@
+# Copyright 2021 UC Davis Plant AI and Biophysics Lab
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import os
+import sys
+import zipfile
+
+import pytest
+
+pytest.importorskip('boto3')
+
+import agml._internal.s3internal as s3internal
+
+
+def _zip_chunks(files, chunk_size = 16):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as z:
+        for name, content in files.items():
+            z.writestr(name, content)
+    data = buffer.getvalue()
+    return [data[i: i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+@pytest.mark.parametrize('max_size', [1024 * 1024, 1])
+def test_extract_zip_stream_fallback(tmp_path, monkeypatch, max_size):
+    # Without `stream-unzip`, the zip is spooled (in memory, or on
+    # disk once it exceeds the maximum size) and read with `zipfile`.
+    monkeypatch.setitem(sys.modules, 'stream_unzip', None)
+    monkeypatch.setattr(s3internal, '_SPOOLED_ZIP_MAX_SIZE', max_size)
+    files = {'dataset/a.txt': b'apple', 'dataset/images/b.txt': b'bean' * 100}
+    s3internal._extract_zip_stream(_zip_chunks(files), str(tmp_path))
+    for name, content in files.items():
+        with open(os.path.join(tmp_path, name), 'rb') as f:
+            assert f.read() == content
+
+
+@pytest.mark.parametrize('name', [
+    '../outside.txt', 'dataset/../../outside.txt', '/tmp/outside.txt'])
+def test_member_path_rejects_traversal(tmp_path, name):
+    with pytest.raises(ValueError):
+        s3internal._member_path(str(tmp_path), name)
+
+
+def test_member_path_inside_destination(tmp_path):
+    assert s3internal._member_path(str(tmp_path), 'dataset/images/a.png') \
+           == os.path.join(str(tmp_path), 'dataset', 'images', 'a.png')
+
+
+def test_extract_rejects_traversal_member(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'stream_unzip', None)
+    dest_dir = tmp_path / 'dest'
+    chunks = _zip_chunks({'dataset/a.txt': b'apple', '../outside.txt': b'x'})
+    with pytest.raises(ValueError):
+        s3internal._extract_zip_stream(chunks, str(dest_dir))
+    assert not (tmp_path / 'outside.txt').exists()
+
+
+def test_extract_members_larger_than_buffer(tmp_path, monkeypatch):
+    # The members are copied to disk in chunks of `_EXTRACT_BUFFER_SIZE`.
+    monkeypatch.setitem(sys.modules, 'stream_unzip', None)
+    monkeypatch.setattr(s3internal, '_EXTRACT_BUFFER_SIZE', 64)
+    content = bytes(range(256)) * 40
+    s3internal._extract_zip_stream(
+        _zip_chunks({'dataset/large.bin': content}), str(tmp_path))
+    with open(os.path.join(tmp_path, 'dataset', 'large.bin'), 'rb') as f:
+        assert f.read() == content
@@ -0,0 +1,43 @@
+# Copyright 2021 UC Davis Plant AI and Biophysics Lab
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('torchvision')
+pytest.importorskip('pytorch_lightning')
+
+from agml.models.classification import ClassificationModel
+
+
+@pytest.fixture(scope = 'module')
+def classification_model():
+    torch.manual_seed(0)
+    return ClassificationModel(num_classes = 3).eval()
+
+
+@pytest.mark.parametrize('one_hot', [False, True])
+def test_evaluate_unbatched_samples(classification_model, one_hot):
+    model = classification_model
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 255, (32, 32, 3), dtype = np.uint8) for _ in range(3)]
+    predictions = [int(model.predict(image)) for image in images]
+
+    # The first two labels match the predictions, and the last doesn't.
+    labels = [predictions[0], predictions[1], (predictions[2] + 1) % 3]
+    if one_hot:
+        labels = [np.eye(3, dtype = np.float32)[label] for label in labels]
+    accuracy = model.evaluate(list(zip(images, labels)))
+    assert accuracy == pytest.approx(2 / 3)
@@ -0,0 +1,65 @@
+# Copyright 2021 UC Davis Plant AI and Biophysics Lab
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('torchvision')
+pytest.importorskip('pytorch_lightning')
+
+from torch import nn
+from pytorch_lightning import LightningModule
+
+from agml.models.base import _AgMLInferenceBase
+
+
+class _InferenceOnlyModel(_AgMLInferenceBase):
+    """A minimal model built only on the inference base."""
+
+    _ml_task = 'image_classification'
+
+    def __init__(self):
+        super(_InferenceOnlyModel, self).__init__()
+        self.net = nn.Conv2d(3, 2, kernel_size = 1)
+
+    def preprocess_input(self, images, **kwargs):
+        images = np.asarray(self._expand_input_images(images))
+        return self._fused_preprocess(
+            images, [0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
+
+    @torch.no_grad()
+    def predict(self, images, **kwargs):
+        out = self.net(self.preprocess_input(images))
+        return self._to_out(torch.argmax(out.mean(dim = (2, 3)), 1))
+
+
+def test_inference_base_model():
+    model = _InferenceOnlyModel().eval()
+    assert not isinstance(model, LightningModule)
+    images = np.random.default_rng(0).integers(
+        0, 255, (2, 16, 16, 3), dtype = np.uint8)
+    predictions = model.predict(images)
+    assert isinstance(predictions, np.ndarray) and predictions.shape == (2, )
+    assert set(model.state_dict()) == {'net.weight', 'net.bias'}
+
+
+def test_inference_base_input_buffer():
+    model = _InferenceOnlyModel()
+    buffer = model._input_buffer(4)
+    assert buffer.shape == (4, 3, 224, 224) and not buffer.is_pinned()
+    assert buffer.is_contiguous(memory_format = torch.channels_last)
+    assert model._input_buffer(2).data_ptr() == buffer.data_ptr()
+    assert model._input_buffer(8).shape == (8, 3, 224, 224)
+    assert model._input_buffer(2, size = (64, 64)).shape == (2, 3, 64, 64)
@@ -0,0 +1,69 @@
+# Copyright 2021 UC Davis Plant AI and Biophysics Lab
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('torchvision')
+pytest.importorskip('pytorch_lightning')
+
+from agml.models.legacy.classification_efficientnet import \
+    ClassificationModel as LegacyClassificationModel
+
+
+@pytest.fixture
+def legacy_classification_model():
+    model = LegacyClassificationModel(num_classes = 3)
+    model._prepare_for_training(metrics = ['accuracy'], optimizer = 'adam')
+    return model
+
+
+def test_legacy_stage_start_hooks(legacy_classification_model):
+    model = legacy_classification_model
+    assert isinstance(model._metrics, list)
+    model.on_train_start()
+    model.on_validation_start()
+    model.on_test_start()
+    assert model._named_metrics()[0][0] == 'accuracy'
+
+
+def test_legacy_metrics_reset_at_epoch_end(legacy_classification_model):
+    model = legacy_classification_model
+    metric = model._named_metrics()[0][1]
+    for hook in (model.on_train_epoch_end, model.on_validation_epoch_end):
+        metric.update(torch.tensor([0, 1]), torch.tensor([0, 0]))
+        hook()
+        assert len(metric._prediction_data) == 0
+
+
+def test_accuracy_accumulates_batches():
+    from agml.models.metrics.accuracy import Accuracy
+    metric = Accuracy()
+    metric.update(torch.tensor([0, 1, 2]), torch.tensor([0, 1, 1]))
+    metric.update(np.array([2, 2]), np.array([2, 0]))
+    metric.update([torch.tensor(1)], [torch.tensor(1)])
+    assert len(metric._prediction_data) == 3
+    assert metric.compute().item() == pytest.approx(4 / 6)
+    metric.reset()
+    assert len(metric._prediction_data) == 0
+
+    # One-hot truths, and the logits of the predictions.
+    metric.update(torch.tensor([0, 2]), torch.tensor([[1, 0, 0], [0, 1, 0]]))
+    assert metric.compute().item() == pytest.approx(0.5)
+    metric.reset()
+    metric.update(torch.tensor([[0.1, 0.9], [0.8, 0.2]]), torch.tensor([1, 1]))
+    assert metric.compute().item() == pytest.approx(0.5)
+    with pytest.raises(ValueError):
+        metric.update(torch.tensor([0, 1]), torch.tensor([0]))
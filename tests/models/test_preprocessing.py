@@ -0,0 +1,151 @@
+# Copyright 2021 UC Davis Plant AI and Biophysics Lab
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cv2
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('torchvision')
+pytest.importorskip('pytorch_lightning')
+
+import agml.models.tools as tools
+from agml.models.classification import ClassificationModel
+from agml.models.tools import (
+    fused_preprocess, imagenet_style_process, IMAGENET_MEAN, IMAGENET_STD
+)
+
+
+def _reference_read(path):
+    # How each image path used to be read, one image at a time.
+    return cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB)
+
+
+@pytest.fixture
+def image_paths(tmp_path):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i, shape in enumerate([(48, 64, 3), (48, 64, 3), (32, 40, 3)]):
+        path = str(tmp_path / f'image_{i}.png')
+        cv2.imwrite(path, rng.integers(0, 255, shape, dtype = np.uint8))
+        paths.append(path)
+    return paths
+
+
+def test_expand_path_list_batch(image_paths):
+    images = ClassificationModel._expand_input_images(image_paths[:2])
+    assert isinstance(images, np.ndarray) and images.shape == (2, 48, 64, 3)
+    for image, path in zip(images, image_paths):
+        np.testing.assert_array_equal(image, _reference_read(path))
+
+
+def test_expand_path_list_mixed_sizes(image_paths):
+    images = ClassificationModel._expand_input_images(image_paths)
+    assert len(images) == 3
+    for image, path in zip(images, image_paths):
+        np.testing.assert_array_equal(image, _reference_read(path))
+
+
+def test_expand_single_path(image_paths):
+    images = ClassificationModel._expand_input_images(image_paths[2])
+    assert len(images) == 1
+    np.testing.assert_array_equal(images[0], _reference_read(image_paths[2]))
+
+
+@pytest.mark.parametrize('kernel', ['compiled', 'numpy'])
+def test_fused_preprocess(monkeypatch, kernel):
+    if kernel == 'numpy': # the fallback without Numba
+        monkeypatch.setattr(tools, '_compile_fused_preprocess', lambda: None)
+    images = np.random.default_rng(0).integers(
+        0, 255, (2, 8, 10, 3), dtype = np.uint8)
+    mean = np.asarray(IMAGENET_MEAN, dtype = np.float32) * 255.
+    inv_std = 1. / (np.asarray(IMAGENET_STD, dtype = np.float32) * 255.)
+    expected = ((images.astype(np.float32) - mean) * inv_std).transpose(0, 3, 1, 2)
+    np.testing.assert_allclose(
+        fused_preprocess(images, mean, inv_std), expected, rtol = 1e-5, atol = 1e-5)
+    out = np.empty((2, 3, 8, 10), dtype = np.float32)
+    fused_preprocess(images, mean, inv_std, out = out)
+    np.testing.assert_allclose(out, expected, rtol = 1e-5, atol = 1e-5)
+
+
+@pytest.mark.parametrize('size', [(224, 224), (100, 150)])
+def test_preprocess_input_matches_per_image(size):
+    images = np.random.default_rng(0).integers(
+        0, 255, (3, *size, 3), dtype = np.uint8)
+    expected = torch.stack([imagenet_style_process(image) for image in images])
+    processed = ClassificationModel.preprocess_input(images)
+    assert processed.shape == (3, 3, 224, 224)
+    torch.testing.assert_close(processed, expected, rtol = 1e-4, atol = 1e-4)
+
+
+def test_expand_array_list_batch():
+    rng = np.random.default_rng(0)
+    arrays = [rng.integers(0, 255, (16, 20, 3), dtype = np.uint8) for _ in range(3)]
+    images, is_batched = ClassificationModel._expand_input_images_batched(arrays)
+    assert is_batched
+    np.testing.assert_array_equal(images, np.stack(arrays))
+    processed = ClassificationModel.preprocess_input(arrays)
+    expected = torch.stack([imagenet_style_process(array) for array in arrays])
+    torch.testing.assert_close(processed, expected, rtol = 1e-4, atol = 1e-4)
+
+
+def test_expand_batch_unchanged():
+    batch = np.random.default_rng(0).integers(0, 255, (2, 16, 20, 3), dtype = np.uint8)
+    images, is_batched = ClassificationModel._expand_input_images_batched(batch)
+    assert is_batched and images is batch
+
+
+def test_expand_mixed_array_list():
+    rng = np.random.default_rng(0)
+    arrays = [rng.integers(0, 255, shape, dtype = np.uint8)
+              for shape in [(16, 20, 3), (10, 12, 3)]]
+    images, is_batched = ClassificationModel._expand_input_images_batched(arrays)
+    assert not is_batched
+    assert all(image is array for image, array in zip(images, arrays))
+
+
+class _SubclassedArray(np.ndarray):
+    pass
+
+
+@pytest.mark.parametrize('convert', [
+    np.asarray, torch.from_numpy, lambda x: x.view(_SubclassedArray)])
+def test_expand_dispatch(convert):
+    batch = np.random.default_rng(0).integers(0, 255, (2, 16, 20, 3), dtype = np.uint8)
+    images = ClassificationModel._expand_input_images(convert(batch))
+    assert len(images) == 2
+    np.testing.assert_array_equal(np.stack([np.asarray(i) for i in images]), batch)
+    images = ClassificationModel._expand_input_images(convert(batch[0]))
+    assert len(images) == 1
+    np.testing.assert_array_equal(np.asarray(images[0]), batch[0])
+
+
+def test_expand_invalid_input():
+    pytest.importorskip('tensorflow') # `is_array_like` checks for tf.Tensor
+    with pytest.raises(TypeError):
+        ClassificationModel._expand_input_images(42)
+
+
+def test_expand_gpu_unsupported_formats(tmp_path):
+    # Images `torchvision.io` can't decode are left to the CPU pipeline.
+    image = np.random.default_rng(0).integers(0, 255, (16, 20, 3), dtype = np.uint8)
+    for extension in ('bmp', 'tiff'):
+        path = str(tmp_path / f'image.{extension}')
+        cv2.imwrite(path, image)
+        assert ClassificationModel._expand_input_images_gpu(path, 'cpu') is None
+    path = str(tmp_path / 'image.png')
+    cv2.imwrite(path, image)
+    images = ClassificationModel._expand_input_images_gpu(path, 'cpu')
+    np.testing.assert_array_equal(
+        images[0].permute(1, 2, 0).numpy(), _reference_read(path))
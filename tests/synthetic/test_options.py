@@ -0,0 +1,63 @@
+# Copyright 2021 UC Davis Plant AI and Biophysics Lab
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import pickle
+
+import pytest
+
+from agml.synthetic.options import CanopyParameters, CameraParameters
+
+
+@pytest.fixture
+def canopy_parameters():
+    return CanopyParameters(
+        leaf_length = 0.2, leaf_subdivisions = [1, 5], leaf_color = 'green')
+
+
+def test_parameters_unset_fields(canopy_parameters):
+    assert canopy_parameters.leaf_width is None
+    assert canopy_parameters.leaf_length == 0.2
+    assert 'leaf_width' not in repr(canopy_parameters)
+    with pytest.raises(AttributeError):
+        canopy_parameters.leaf_width = 0.1
+    with pytest.raises(TypeError):
+        canopy_parameters.leaf_length = 'long'
+
+
+def test_parameters_equality(canopy_parameters):
+    other = CanopyParameters(
+        leaf_length = 0.2, leaf_subdivisions = [1, 5], leaf_color = 'green')
+    assert canopy_parameters == other
+    other.leaf_length = 0.3
+    assert canopy_parameters != other
+    assert canopy_parameters != CameraParameters()
+
+
+def test_parameters_pickle(canopy_parameters):
+    loaded = pickle.loads(pickle.dumps(canopy_parameters))
+    assert loaded == canopy_parameters
+    assert loaded.leaf_width is None
+    assert loaded._defined_fields == canopy_parameters._defined_fields
+    with pytest.raises(AttributeError):
+        loaded.leaf_width = 0.1
+
+
+def test_parameters_deepcopy(canopy_parameters):
+    copied = copy.deepcopy(canopy_parameters)
+    assert copied == canopy_parameters
+    assert copied.leaf_width is None
+    assert copied.leaf_subdivisions is not canopy_parameters.leaf_subdivisions
+    copied.leaf_subdivisions.append(10)
+    assert canopy_parameters.leaf_subdivisions == [1, 5]